@@ -0,0 +1,108 @@
+"""Result aggregates maintained incrementally at submission time.
+
+One row per section plus a global row (``GLOBAL``) holds count, sum and sum of
+squares of scores, the sum and largest of the maximum scores, the pass count, a score
+histogram and a log-bucket sketch of time taken, so the Professor Panel can show its
+metrics without scanning results. Each result counts against its own maximum, so
+papers of different lengths mix correctly.
+"""
+import json
+import math
+
+GLOBAL = "*"
+SKETCH_GAMMA = 1.02  # Bucket growth factor; quantiles are within ~1% of the true value
+
+
+def _bucket(value):
+    return math.ceil(math.log(max(value, 1e-3)) / math.log(SKETCH_GAMMA))
+
+
+def sketch_add(sketch, value):
+    key = str(_bucket(value))
+    sketch[key] = sketch.get(key, 0) + 1
+
+
+def sketch_quantile(sketch, q):
+    total = sum(sketch.values())
+    if not total:
+        return None
+    rank = q * (total - 1)
+    seen = 0
+    for key in sorted(sketch, key=int):
+        seen += sketch[key]
+        if seen > rank:
+            # Midpoint of the bucket (gamma^(k-1), gamma^k]
+            return 2 * SKETCH_GAMMA ** int(key) / (SKETCH_GAMMA + 1)
+    return 2 * SKETCH_GAMMA ** int(max(sketch, key=int)) / (SKETCH_GAMMA + 1)
+
+
+def is_pass(score, max_score):
+    return score >= max_score / 2
+
+
+def update_aggregates(conn, section, score, time_taken, max_score):
+    """Folds one submission into the section and global rows; call inside the submission transaction"""
+    passed = 1 if is_pass(score, max_score) else 0
+    for scope in (section or "", GLOBAL):
+        row = conn.execute("SELECT histogram, time_sketch FROM result_aggregates WHERE scope = ?", (scope,)).fetchone()
+        histogram = json.loads(row[0]) if row else {}
+        sketch = json.loads(row[1]) if row else {}
+        histogram[str(score)] = histogram.get(str(score), 0) + 1
+        sketch_add(sketch, time_taken)
+
+        conn.execute(
+            """INSERT INTO result_aggregates
+                   (scope, count, score_sum, score_sq_sum, max_score_sum, max_score_top, pass_count,
+                    histogram, time_sketch)
+               VALUES (?, 1, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(scope) DO UPDATE SET
+                   count = count + 1,
+                   score_sum = score_sum + excluded.score_sum,
+                   score_sq_sum = score_sq_sum + excluded.score_sq_sum,
+                   max_score_sum = max_score_sum + excluded.max_score_sum,
+                   max_score_top = MAX(max_score_top, excluded.max_score_top),
+                   pass_count = pass_count + excluded.pass_count,
+                   histogram = excluded.histogram,
+                   time_sketch = excluded.time_sketch""",
+            (scope, score, score * score, max_score, max_score, passed, json.dumps(histogram), json.dumps(sketch))
+        )
+
+
+def get_aggregates(conn, section=None):
+    """Returns the summary for a section (or all sections) as a dict, or None if empty"""
+    row = conn.execute(
+        """SELECT count, score_sum, score_sq_sum, max_score_sum, max_score_top, pass_count, histogram, time_sketch
+           FROM result_aggregates WHERE scope = ?""",
+        (section or GLOBAL,)
+    ).fetchone()
+    if not row or not row[0]:
+        return None
+
+    count, score_sum, score_sq_sum, max_score_sum, max_score_top, pass_count, histogram, sketch = row
+    sketch = json.loads(sketch)
+    mean = score_sum / count
+    return {
+        "count": count,
+        "mean": mean,
+        "std": math.sqrt(max(score_sq_sum / count - mean * mean, 0.0)),
+        "score_pct": score_sum / max_score_sum * 100 if max_score_sum else None,
+        "max_score": max_score_top,
+        "pass_count": pass_count,
+        "pass_rate": pass_count / count * 100,
+        "histogram": {int(k): v for k, v in json.loads(histogram).items()},
+        "time_p50": sketch_quantile(sketch, 0.5),
+        "time_p90": sketch_quantile(sketch, 0.9),
+        "time_p99": sketch_quantile(sketch, 0.99),
+    }
+
+
+def rebuild_aggregates(conn, default_max_score):
+    """Recomputes every aggregate row from the results table (for backfills); call inside a transaction.
+
+    Each result is judged against its stored max_score; default_max_score is only used
+    for results stored without one.
+    """
+    conn.execute("DELETE FROM result_aggregates")
+    rows = conn.execute("SELECT section, score, time_taken, max_score FROM results").fetchall()
+    for section, score, time_taken, max_score in rows:
+        update_aggregates(conn, section, score, time_taken or 0.0, max_score or default_max_score)
@@ -0,0 +1 @@
+"""One module per sidebar page; each exposes render()."""
@@ -0,0 +1,24 @@
+"""Change Password for the logged-in user (at most twice)."""
+import streamlit as st
+
+from users import update_password
+from app_pages.common import hash_password, authenticate_user, invalidate_identity
+
+
+def render():
+    if not st.session_state.logged_in:
+        st.warning("Please login first!")
+    else:
+        username = st.session_state.username
+        old_pass = st.text_input("Old Password", type="password")
+        new_pass = st.text_input("New Password", type="password")
+        if st.button("Change Password"):
+            if not authenticate_user(username, old_pass):
+                st.error("Old password is incorrect!")
+            else:
+                # Limit check, update and change count run in one transaction
+                if update_password(username, hash_password(new_pass), max_changes=2):
+                    invalidate_identity()
+                    st.success("Password updated successfully.")
+                else:
+                    st.error("Password can only be changed twice.")
@@ -0,0 +1,107 @@
+"""Constants and helpers shared by the page modules.
+
+Kept free of heavy imports: every page loads this, including Register and Login.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import tempfile
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import RerunData
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.runtime.scriptrunner import RerunException
+
+from users import user_exists, create_user
+from auth import authenticate, load_identity
+from presence import heartbeat, set_status, live_students, HEARTBEAT_INTERVAL
+from outbox import enqueue
+from tracing import count
+
+# Constants
+PROFESSOR_SECRET_KEY = "RRCE@123"
+PROF_CSV_FILE = "professor_results.csv"
+
+# Use tempfile for all directories
+RECORDING_DIR = os.path.join(tempfile.gettempdir(), "recordings")
+PHOTO_DIR = os.path.join(tempfile.gettempdir(), "student_photos")
+CSV_FILE = os.path.join(tempfile.gettempdir(), "quiz_results.csv")
+
+# Password hashing
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def register_user(username, password, role, email):
+    try:
+        # Check if username already exists
+        if user_exists(username):
+            st.error("Username already exists!")
+            return False
+            
+        # Insert new user
+        create_user(username, hash_password(password), role, email)
+        st.success("Registration successful! Please login.")
+        return True
+        
+    except sqlite3.Error as e:
+        st.error(f"Database error during registration: {str(e)}")
+        return False
+
+def authenticate_user(username, password, role=None):
+    """Returns the user's Identity (role, email, attempt count) if the password matches, else None"""
+    try:
+        return authenticate(username, hash_password(password), role)
+    except sqlite3.Error as e:
+        st.error(f"Authentication error: {str(e)}")
+        return None
+
+def current_identity():
+    """Identity of the logged-in user, cached for the session and reloaded after invalidation"""
+    identity = st.session_state.get('identity')
+    if identity is None or identity.username != st.session_state.username:
+        count("identity_cache.misses")
+        identity = load_identity(st.session_state.username)
+        st.session_state.identity = identity
+    else:
+        count("identity_cache.hits")
+    return identity
+
+def invalidate_identity():
+    st.session_state.pop('identity', None)
+
+def send_email_otp(to_email, otp):
+    try:
+        # Queued for the background sender, so the page doesn't wait on SMTP
+        enqueue(to_email, "Email Verification OTP - Secure Quiz App", f"Your OTP for Secure Quiz App is: {otp}")
+        return True
+    except Exception as e:
+        st.error(f"Failed to send OTP: {e}")
+        return False
+
+def add_active_student(username):
+    """Records a presence heartbeat for the student, at most every HEARTBEAT_INTERVAL seconds"""
+    try:
+        now = time.time()
+        if now - st.session_state.get('last_heartbeat', 0) >= HEARTBEAT_INTERVAL:
+            heartbeat(username)
+            st.session_state.last_heartbeat = now
+    except Exception as e:
+        st.error(f"Error adding student: {str(e)}")
+
+def update_student_status(username, status, answered=None, total=None):
+    """Publishes the student's quiz progress to the monitoring change feed"""
+    try:
+        set_status(username, status, answered, total)
+    except Exception as e:
+        st.error(f"Error updating status: {str(e)}")
+
+def get_live_students():
+    """Returns students with a recent presence heartbeat, with their quiz progress"""
+    return live_students()
+
+def rerun():
+    """Programmatically rerun the Streamlit app"""
+    ctx = get_script_run_ctx()
+    if ctx:
+        raise RerunException(RerunData())
@@ -0,0 +1,78 @@
+"""Login, plus the forgot-password OTP reset flow."""
+import random
+
+import streamlit as st
+
+from users import find_username_by_email, update_password
+from app_pages.common import hash_password, authenticate_user, invalidate_identity, send_email_otp
+
+
+def render():
+    st.subheader("Login")
+
+    if 'login_username' not in st.session_state:
+        st.session_state.login_username = ""
+    if 'login_password' not in st.session_state:
+        st.session_state.login_password = ""
+
+    username = st.text_input("Username", value=st.session_state.login_username, key="login_username_widget")
+    password = st.text_input("Password", type="password", value=st.session_state.login_password, key="login_password_widget")
+    
+    if st.button("Login"):
+        identity = authenticate_user(username, password)
+        if identity:
+            st.session_state.logged_in = True
+            st.session_state.username = username
+            st.session_state.role = identity.role
+            st.session_state.identity = identity
+            st.success("Login successful!")
+        else:
+            st.error("Invalid username or password.")
+
+    st.markdown("### Forgot Password?")
+    forgot_email = st.text_input("Enter registered email", key="forgot_email_input")
+    
+    if st.button("Send Reset OTP"):
+        user = find_username_by_email(forgot_email)
+
+        if user:
+            otp = str(random.randint(100000, 999999))
+            st.session_state['reset_email'] = forgot_email
+            st.session_state['reset_otp'] = otp
+            st.session_state['reset_user'] = user
+            if send_email_otp(forgot_email, otp):
+                st.success("OTP sent to your email.")
+        else:
+            st.error("Email not registered.")
+
+    if 'reset_otp' in st.session_state and 'reset_email' in st.session_state:
+        st.markdown("### Reset Your Password")
+        entered_otp = st.text_input("Enter OTP to reset password", key="reset_otp_input")
+        new_password = st.text_input("New Password", type="password", key="reset_new_password")
+        confirm_password = st.text_input("Confirm New Password", type="password", key="reset_confirm_password")
+
+        if st.button("Reset Password"):
+            if entered_otp == st.session_state.get('reset_otp'):
+                if new_password == confirm_password:
+                    try:
+                        # Password update and change count commit together
+                        if update_password(st.session_state['reset_user'], hash_password(new_password)):
+                            invalidate_identity()
+                            st.session_state.login_username = st.session_state['reset_user']
+                            st.session_state.login_password = new_password
+                            
+                            st.success("Password reset successfully! Your credentials have been filled below. Click Login to continue.")
+                            
+                            for key in ['reset_otp', 'reset_email', 'reset_user']:
+                                if key in st.session_state:
+                                    del st.session_state[key]
+                            
+                            st.rerun()
+                        else:
+                            st.error("Password update failed. Please try again.")
+                    except Exception as e:
+                        st.error(f"Error updating password: {str(e)}")
+                else:
+                    st.error("Passwords do not match. Please try again.")
+            else:
+                st.error("Incorrect OTP. Please try again.")
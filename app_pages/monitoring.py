@@ -0,0 +1,71 @@
+"""Professor Monitoring Panel: live quiz takers, redrawn from the change feed."""
+import time
+import sqlite3
+from datetime import datetime
+
+import streamlit as st
+
+from presence import PRESENCE_TTL, prune
+from changefeed import wait_for_change, trim
+from app_pages.common import PROFESSOR_SECRET_KEY, get_live_students
+
+MONITOR_POLL_SECONDS = 2  # How long the Monitoring Panel waits on the change feed between checks
+MONITOR_MAX_BACKOFF = 30  # Longest wait between retries while the database is busy or unavailable
+
+
+def render():
+    if not st.session_state.get('prof_verified', False):
+        secret_key = st.text_input("Enter Professor Secret Key", type="password")
+        if st.button("Verify") and secret_key == PROFESSOR_SECRET_KEY:
+            st.session_state.prof_verified = True
+            st.rerun()
+    else:
+        st.header("👥 Active Quiz Takers")
+        board = st.empty()
+        status = st.empty()
+        last_checked = st.empty()
+        try:
+            # Instead of rerunning the whole script on a timer, wait on the change feed and
+            # redraw the board in place only when a student's status changes (or someone ages out)
+            version = -1
+            last_draw = 0
+            backoff = MONITOR_POLL_SECONDS
+            while True:
+                try:
+                    new_version = wait_for_change(version, timeout=MONITOR_POLL_SECONDS)
+                    now = time.time()
+                    if new_version != version or now - last_draw >= PRESENCE_TTL / 5:
+                        if now - last_draw >= PRESENCE_TTL / 5:
+                            # Drop aged-out students and old events, so both tables stay the size of the sitting
+                            prune()
+                            trim()
+                        active_students = get_live_students()
+                        version, last_draw = new_version, now
+                        with board.container():
+                            if not active_students:
+                                st.warning("No students currently taking the quiz")
+                            else:
+                                for student in active_students:
+                                    progress = ""
+                                    if student["status"] == "answered":
+                                        progress = f" ({student['answered']}/{student['total']})"
+                                    line = f"• {student['username']} — {student['status']}{progress}"
+                                    if student["status"] == "submitted":
+                                        st.info(line)
+                                    else:
+                                        st.success(line)
+                except sqlite3.Error as e:
+                    # A busy database or an exhausted pool is usually gone in a moment, so keep
+                    # the last board up, say why it is stale, and try again a little later each time
+                    status.warning(f"Database busy, retrying in {backoff}s: {str(e)}")
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, MONITOR_MAX_BACKOFF)
+                    continue
+                if backoff != MONITOR_POLL_SECONDS:
+                    status.empty()
+                    backoff = MONITOR_POLL_SECONDS
+                # Also lets Streamlit interrupt this run when the professor navigates away
+                last_checked.caption(f"Live · checked {datetime.now().strftime('%H:%M:%S')}")
+
+        except Exception as e:
+            st.error(f"Monitoring error: {str(e)}")
@@ -0,0 +1,55 @@
+"""Performance: slowest recent reruns, time per instrumented span, counters and gauges."""
+from datetime import datetime
+
+import streamlit as st
+
+from tracing import slowest_reruns, span_summary, snapshot, prometheus_text
+from app_pages.common import PROFESSOR_SECRET_KEY
+
+LONG_POLL_PAGES = ("Professor Monitoring Panel",)  # Reruns that wait on the change feed by design
+
+
+def render():
+    if not st.session_state.get('prof_verified', False):
+        secret_key = st.text_input("Enter Professor Secret Key", type="password")
+        if st.button("Verify") and secret_key == PROFESSOR_SECRET_KEY:
+            st.session_state.prof_verified = True
+            st.rerun()
+    else:
+        st.header("⏱️ Performance")
+        try:
+            col1, col2 = st.columns(2)
+            with col1:
+                limit = st.number_input("Slowest reruns to show", min_value=1, max_value=100, value=10, step=1)
+            with col2:
+                include_long_poll = st.checkbox("Include the Monitoring Panel (long-polls by design)")
+
+            st.subheader("Slowest recent reruns")
+            reruns = [r for r in slowest_reruns(limit=500)
+                      if include_long_poll or r["page"] not in LONG_POLL_PAGES][:limit]
+            if not reruns:
+                st.info("No reruns recorded yet in this server process.")
+            for r in reruns:
+                started = datetime.fromtimestamp(r["started"]).strftime("%H:%M:%S")
+                with st.expander(f"{r['seconds'] * 1000:.0f} ms · {r['page']} · {started}"):
+                    if r["spans"]:
+                        st.dataframe([{"Span": name, "Calls": calls, "ms": round(seconds * 1000, 1)}
+                                      for name, (calls, seconds) in r["spans"]], use_container_width=True)
+                    else:
+                        st.caption("No instrumented calls in this rerun")
+
+            st.subheader("Time by span (all threads, since start)")
+            summary = span_summary()
+            if summary:
+                st.dataframe([{"Span": row["span"], "Calls": row["count"], "Total s": round(row["total"], 3),
+                               "Mean ms": round(row["mean"] * 1000, 2), "Max ms": round(row["max"] * 1000, 1)}
+                              for row in summary], use_container_width=True)
+
+            counters, gauges = snapshot()
+            st.subheader("Counters and gauges")
+            st.json({"counters": counters, "gauges": gauges})
+
+            st.download_button("Download metrics (Prometheus text)", prometheus_text(),
+                               file_name="quiz_metrics.prom", mime="text/plain")
+        except Exception as e:
+            st.error(f"Performance data error: {str(e)}")
@@ -0,0 +1,193 @@
+"""Professor Panel: professor login/registration, result metrics, filtered results and exports."""
+import os
+import random
+import sqlite3
+import tempfile
+
+import streamlit as st
+
+from users import create_user
+from results import list_sections, section_summary, count_results, query_results
+from questionbank import get_bank, paper_size
+from outbox import enqueue
+from app_pages.common import (PROFESSOR_SECRET_KEY, PROF_CSV_FILE, hash_password, authenticate_user,
+                              invalidate_identity)
+
+
+def render():
+    st.subheader("\U0001F9D1‍\U0001F3EB Professor Access Panel")
+    
+    if 'prof_secret_verified' not in st.session_state:
+        secret_key = st.text_input("Enter Professor Secret Key to continue", type="password")
+        
+        if st.button("Verify Key"):
+            if secret_key == PROFESSOR_SECRET_KEY:
+                st.session_state.prof_secret_verified = True
+                st.rerun()
+            else:
+                st.error("Invalid secret key! Access denied.")
+    else:
+        tab1, tab2 = st.tabs(["Professor Login", "Professor Registration"])
+        
+        with tab1:
+            if not st.session_state.get('prof_logged_in', False):
+                prof_id = st.text_input("Professor ID")
+                prof_pass = st.text_input("Professor Password", type="password")
+                
+                if st.button("Login as Professor"):
+                    identity = authenticate_user(prof_id, prof_pass, role="professor")
+                    
+                    if identity:
+                        st.session_state.prof_logged_in = True
+                        st.session_state.username = prof_id
+                        st.session_state.role = "professor"
+                        st.session_state.identity = identity
+                        st.success(f"Welcome Professor {prof_id}!")
+                        os.makedirs(st.session_state.prof_dir, exist_ok=True)
+                        st.rerun()
+                    else:
+                        st.error("Invalid Professor credentials")
+            else:
+                st.success(f"Welcome Professor {st.session_state.username}!")
+                st.subheader("Student Results Management")
+                
+                sections = list_sections()
+                
+                if sections:
+                    selected_section = st.selectbox("Select section", ["All sections"] + sections)
+                    section_filter = None if selected_section == "All sections" else selected_section
+                    try:
+                        # Maintained at submission time, so these are constant-time reads
+                        summary = section_summary(section_filter)
+                        if summary:
+                            col1, col2, col3 = st.columns(3)
+                            with col1:
+                                st.metric("Total Students", summary["count"])
+                            with col2:
+                                # Results are marked out of their own paper's length, so average as a percentage
+                                average = summary["score_pct"]
+                                st.metric("Average Score", f"{average:.1f}%" if average is not None else "—")
+                            with col3:
+                                st.metric("Pass Rate", f"{summary['pass_rate']:.1f}%")
+                            st.caption(f"Mean score {summary['mean']:.1f} (std dev {summary['std']:.2f}) · "
+                                       f"time taken p50 {summary['time_p50']:.0f}s, "
+                                       f"p90 {summary['time_p90']:.0f}s, p99 {summary['time_p99']:.0f}s")
+
+                        st.markdown("### Detailed Results")
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            top_score = (summary["max_score"] if summary else 0) or paper_size()
+                            score_range = st.slider("Score range", 0, top_score, (0, top_score))
+                        with col2:
+                            date_range = st.date_input("Submitted between", value=())
+                        date_from = date_range[0] if len(date_range) > 0 else None
+                        date_to = date_range[1] if len(date_range) > 1 else date_from
+
+                        col1, col2, col3 = st.columns(3)
+                        with col1:
+                            sort_by = st.selectbox("Sort by", ["Score", "Time_Taken", "Timestamp", "Section"])
+                        with col2:
+                            ascending = st.checkbox("Ascending order", True)
+                        with col3:
+                            page_size = st.selectbox("Rows per page", [25, 50, 100], index=1)
+
+                        # Sorting, filtering and paging happen in SQLite; only the visible page is fetched
+                        filters = dict(section=section_filter, min_score=score_range[0], max_score=score_range[1],
+                                       date_from=date_from, date_to=date_to)
+                        total = count_results(**filters)
+                        pages = max(1, (total + page_size - 1) // page_size)
+                        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1)
+                        page_df = query_results(**filters, sort_by=sort_by, ascending=ascending,
+                                                limit=page_size, offset=(page - 1) * page_size)
+                        st.caption(f"{total} matching results")
+                        st.dataframe(page_df)
+                        
+                        # Exports are only built when asked for, streamed to a temp file in chunks
+                        st.markdown("### Export")
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            export_format = st.selectbox("Format", ["csv", "parquet"],
+                                                         format_func=lambda f: "CSV" if f == "csv" else "Parquet (partitioned by Section, zipped)")
+                        with col2:
+                            st.write("")
+                            prepare = st.button("Prepare Export")
+                        if prepare:
+                            from export import export_file
+                            # Built, read once and deleted in this run. The button is only drawn right
+                            # after Prepare, so later reruns neither re-read the file nor serve an
+                            # export built for different filters.
+                            with st.spinner("Exporting results..."), \
+                                    tempfile.TemporaryDirectory(prefix="quiz_export_") as export_dir:
+                                export_path = export_file(export_format, export_dir, sort_by=sort_by,
+                                                          ascending=ascending, **filters)
+                                with open(export_path, "rb") as f:
+                                    export_data = f.read()
+                            export_name = f"{section_filter}_results" if section_filter else os.path.splitext(PROF_CSV_FILE)[0]
+                            st.download_button(
+                                label="Download Results",
+                                data=export_data,
+                                file_name=f"sorted_{export_name}{os.path.splitext(export_path)[1]}",
+                                mime="text/csv" if export_path.endswith(".csv") else "application/zip"
+                            )
+
+                        # Computed from the stored per-answer responses in one vectorized pass
+                        if st.checkbox("Show item analysis"):
+                            from itemanalysis import item_report
+                            report = item_report(get_bank(), section_filter, date_from, date_to)
+                            if report.empty:
+                                st.info("No per-answer responses recorded yet.")
+                            else:
+                                st.caption("Difficulty: share answering correctly. Discrimination: correlation with the rest of the score.")
+                                st.dataframe(report)
+                        
+                    except Exception as e:
+                        st.error(f"Error loading results: {e}")
+                else:
+                    st.warning("No results available yet.")
+                
+                if st.button("Logout"):
+                    st.session_state.prof_logged_in = False
+                    st.session_state.username = ""
+                    st.session_state.role = ""
+                    invalidate_identity()
+                    st.rerun()
+        
+        with tab2:
+            st.subheader("Professor Registration")
+            st.warning("Professor accounts require verification.")
+            
+            full_name = st.text_input("Full Name")
+            designation = st.text_input("Designation")
+            department = st.selectbox("Department", ["CSE", "ISE", "ECE", "EEE", "MECH", "CIVIL"])
+            institutional_email = st.text_input("Institutional Email")
+            
+            if st.button("Request Account"):
+                if full_name and designation and department and institutional_email:
+                    prof_id = f"PROF-{random.randint(10000, 99999)}"
+                    temp_password = str(random.randint(100000, 999999))
+                    
+                    try:
+                        create_user(prof_id, hash_password(temp_password), "professor", institutional_email)
+                        
+                        os.makedirs(f"professor_data/{prof_id}", exist_ok=True)
+                        
+                        try:
+                            enqueue(institutional_email, "Professor Account Credentials", f"""Dear {full_name},
+
+Your professor account has been created:
+
+Username: {prof_id}
+Password: {temp_password}
+
+Please login and change your password immediately.
+
+Regards,
+Quiz App Team""")
+                            
+                            st.success("Account created! Credentials will arrive by email shortly.")
+                        except Exception as e:
+                            st.error(f"Account created but email failed: {e}")
+                    except sqlite3.IntegrityError:
+                        st.error("Professor with this email already exists!")
+                else:
+                    st.error("Please fill all fields!")
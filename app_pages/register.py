@@ -0,0 +1,34 @@
+"""Register: request an email OTP, then create a student account."""
+import random
+
+import streamlit as st
+
+from app_pages.common import register_user, send_email_otp
+
+
+def render():
+    st.subheader("Register")
+    username = st.text_input("Username")
+    email = st.text_input("Email")
+    password = st.text_input("Password", type="password")
+    
+    if st.button("Send OTP"):
+        if username and email and password:
+            otp = str(random.randint(100000, 999999))
+            if send_email_otp(email, otp):
+                st.session_state['reg_otp'] = otp
+                st.session_state['reg_data'] = (username, password, email)
+                st.success("OTP sent to your email.")
+            else:
+                st.error("Failed to send OTP. Please try again.")
+    
+    otp_entered = st.text_input("Enter OTP")
+    if st.button("Verify and Register"):
+        if 'reg_otp' in st.session_state and otp_entered == st.session_state['reg_otp']:
+            username, password, email = st.session_state['reg_data']
+            if register_user(username, password, "student", email):
+                del st.session_state['reg_otp']
+                del st.session_state['reg_data']
+                st.success("Registration successful! Please login.")
+        else:
+            st.error("Incorrect OTP or OTP not requested!")
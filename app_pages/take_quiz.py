@@ -0,0 +1,268 @@
+"""Take Quiz: verification photo, proctoring camera and the paged quiz.
+
+The camera and media stack (streamlit-webrtc, PyAV, OpenCV) is imported here, so only
+students who open this page pay for loading it.
+"""
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+import av
+import streamlit as st
+from streamlit_webrtc import webrtc_streamer, WebRtcMode, VideoProcessorBase
+
+from media import ready_video
+from recorder import StreamingRecorder
+from previews import request_recording_thumbnail, request_photo_thumbnail
+from recordings import segment_prefix, register_segment
+from results import record_submission
+from questionbank import get_bank, paper_size, get_or_create_paper
+from presence import heartbeat, HEARTBEAT_INTERVAL
+from outbox import enqueue
+from tracing import span
+from app_pages.common import (RECORDING_DIR, PHOTO_DIR, hash_password, current_identity, invalidate_identity,
+                              add_active_student, update_student_status)
+
+MAX_ATTEMPTS = 2
+
+
+class VideoProcessor(VideoProcessorBase):
+    def __init__(self, username, usn, section, attempt, profile=None):
+        self.recording = True
+        self.start_time = time.time()
+        self.username = username
+        self.usn = usn
+        self.section = section
+        self.attempt = attempt
+        self.last_heartbeat = 0.0
+        # Frames are sampled to the capture profile's rate and written on a background thread
+        self.recorder = StreamingRecorder(
+            RECORDING_DIR,
+            profile=profile,
+            prefix=segment_prefix(username, usn, section, attempt),
+            on_segment=self._register_segment,
+        )
+
+    def _register_segment(self, path, start_time, end_time, frame_count):
+        register_segment(self.username, self.usn, self.section, self.attempt,
+                         path, start_time, end_time, frame_count)
+        # The proxy is left to View Recordings; encoding every segment would compete with capture
+        request_recording_thumbnail(path)
+
+    def _heartbeat(self):
+        # Frames keep arriving while the student reads without clicking, so presence is kept
+        # fresh from here; the write runs off the receive thread so a busy database never stalls video
+        now = time.time()
+        if now - self.last_heartbeat >= HEARTBEAT_INTERVAL:
+            self.last_heartbeat = now
+            threading.Thread(target=self._send_heartbeat, name="heartbeat", daemon=True).start()
+
+    def _send_heartbeat(self):
+        try:
+            heartbeat(self.username)
+        except Exception:
+            pass  # Database busy; the next heartbeat is only HEARTBEAT_INTERVAL away
+
+    def recv(self, frame):
+        try:
+            with span("camera.recv"):
+                img = frame.to_ndarray(format="bgr24")
+
+                if self.recording:
+                    self.recorder.submit(img)
+                    self._heartbeat()
+
+                return av.VideoFrame.from_ndarray(img, format="bgr24")
+        except Exception as e:
+            st.error(f"Camera error: {str(e)}")
+            return frame
+
+    def stats(self):
+        """Recorder queue depth and dropped/written frame counters"""
+        return self.recorder.stats()
+
+    def on_ended(self):
+        """Called by streamlit-webrtc when the camera track ends; finalizes and registers the last segment"""
+        self.recording = False
+        self.recorder.close()
+
+
+
+def render():
+    if not st.session_state.logged_in:
+        st.warning("Please login first!")
+    else:
+        username = st.session_state.username
+        usn = st.text_input("Enter your USN")
+        section = st.text_input("Enter your Section")
+        st.session_state.usn = usn.strip().upper()
+        st.session_state.section = section.strip().upper()
+        # Heartbeat on every rerun so the student stays listed while the quiz page is open
+        if "quiz_active" not in st.session_state:
+            update_student_status(username, "started", 0, paper_size())
+            st.session_state.quiz_active = True
+        add_active_student(st.session_state.username)
+        if usn and section:
+            try:
+                identity = current_identity()
+                attempt_count = identity.attempt_count if identity else 0
+
+                if attempt_count >= MAX_ATTEMPTS:
+                    st.error(f"You have already taken the quiz {MAX_ATTEMPTS} times. No more attempts allowed.")
+                else:
+                    score = 0
+                    # Drawn once per attempt and stored, so reloads show the same paper. A new
+                    # attempt starts its own clock and progress, so the submitted status of the
+                    # last one stays on the Monitoring board until the student answers again.
+                    paper_key = (username, attempt_count + 1)
+                    if st.session_state.get('paper_key') != paper_key:
+                        st.session_state.paper = get_or_create_paper(username, attempt_count + 1)
+                        st.session_state.paper_key = paper_key
+                        st.session_state.quiz_answers = {}
+                        st.session_state.quiz_page = 0
+                        st.session_state.quiz_media = {}
+                        st.session_state.quiz_start_time = time.time()
+                        st.session_state.answered_reported = 0
+                    paper = st.session_state.paper
+                    bank = get_bank()
+
+                    time_elapsed = int(time.time() - st.session_state.quiz_start_time)
+                    time_limit = 25 * 60  # 25 minutes
+                    time_left = time_limit - time_elapsed
+
+                    if time_left <= 0:
+                        st.warning("⏰ Time is up! Auto-submitting your quiz.")
+                        st.session_state.auto_submit = True
+                    else:
+                        mins, secs = divmod(time_left, 60)
+                        st.info(f"⏳ Time left: {mins:02d}:{secs:02d}")
+
+                    # Take verification photo
+                    st.markdown("### Verification Photo")
+                    img_file_buffer = st.camera_input("Take a verification photo")
+                    
+                    if img_file_buffer is not None:
+                        try:
+                            os.makedirs(PHOTO_DIR, exist_ok=True)
+                            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                            img_path = os.path.join(PHOTO_DIR, f"{username}_{st.session_state.usn}_{timestamp}.jpg")
+                            
+                            with span("file.photo_write"), open(img_path, "wb") as f:
+                                f.write(img_file_buffer.getvalue())
+                            request_photo_thumbnail(img_path)
+                            st.success("✅ Verification photo saved!")
+                            if not st.session_state.get('photo_reported'):
+                                update_student_status(username, "photo taken")
+                                st.session_state.photo_reported = True
+                        except Exception as e:
+                            st.error(f"Failed to save photo: {str(e)}")
+
+                    # Proctoring webcam, recorded in segments tagged with this attempt. The factory only
+                    # runs when the stream starts, so the key names the attempt, USN and section: a new
+                    # attempt or a changed identity ends the old stream (its on_ended() finalizes the
+                    # segment) and starts one with a processor built for the new values
+                    webrtc_streamer(
+                        key=f"proctoring-{st.session_state.usn}-{st.session_state.section}-a{attempt_count + 1}",
+                        mode=WebRtcMode.SENDRECV,
+                        video_processor_factory=lambda u=username, n=st.session_state.usn, s=st.session_state.section, a=attempt_count + 1: VideoProcessor(u, n, s, a),
+                        media_stream_constraints={"video": True, "audio": False},
+                    )
+
+                    # Only the current question is rendered, so a rerun costs the same for any paper length
+                    idx = min(st.session_state.quiz_page, len(paper) - 1)
+                    qid = paper[idx]
+                    question = bank.get(qid)
+                    question_text = question["question"]
+                    st.progress((idx + 1) / len(paper), text=f"Question {idx + 1} of {len(paper)}")
+
+                    # Video paths are looked up once per session; misses are retried until the render lands
+                    final_video_path = st.session_state.quiz_media.get(qid)
+                    if final_video_path is None:
+                        final_video_path = ready_video(question_text)
+                        if final_video_path:
+                            st.session_state.quiz_media[qid] = final_video_path
+
+                    if final_video_path:
+                        try:
+                            st.video(final_video_path)
+                        except Exception as e:
+                            st.error(f"Error displaying video: {str(e)}")
+                            st.markdown(f"**Q{idx+1}:** {question_text}")
+                    else:
+                        st.markdown(f"**Q{idx+1}:** {question_text}")
+
+                    def save_answer(qid=qid):
+                        st.session_state.quiz_answers[qid] = st.session_state[f"q_{qid}"]
+
+                    options = question['options']
+                    st.radio("Select your answer:", range(len(options)), key=f"q_{qid}",
+                             index=st.session_state.quiz_answers.get(qid),
+                             format_func=lambda i, options=options: options[i], on_change=save_answer)
+
+                    def go_to(page):
+                        st.session_state.quiz_page = page
+
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.button("Previous", disabled=idx == 0, on_click=go_to, args=(idx - 1,))
+                    with col2:
+                        st.button("Next", disabled=idx == len(paper) - 1, on_click=go_to, args=(idx + 1,))
+
+                    answers = {q: st.session_state.quiz_answers.get(q) for q in paper}
+                    answered = sum(a is not None for a in answers.values())
+                    st.caption(f"Answered {answered} of {len(paper)}")
+                    if answered != st.session_state.get('answered_reported', 0):
+                        update_student_status(username, "answered", answered, len(paper))
+                        st.session_state.answered_reported = answered
+
+                    if st.button("Submit Quiz"):
+                        if None in answers.values():
+                            st.error("Please answer all questions before submitting the quiz.")
+                        else:
+                            try:
+                                # Calculate score against the id-indexed answer key
+                                score = bank.grade(paper, [answers[qid] for qid in paper])
+                                
+                                time_taken = round(time.time() - st.session_state.quiz_start_time, 2)
+                    
+                                # Save result and count the attempt in one transaction
+                                result_id = record_submission(username, hash_password(username), st.session_state.usn,
+                                                              st.session_state.section, score, time_taken, len(paper),
+                                                              question_ids=paper, choices=[answers[qid] for qid in paper],
+                                                              max_attempts=MAX_ATTEMPTS)
+                                if result_id is None:
+                                    # Another tab or session used the last attempt after this one cached the count
+                                    invalidate_identity()
+                                    st.error(f"You have already taken the quiz {MAX_ATTEMPTS} times. No more attempts allowed.")
+                                    st.stop()
+                    
+                                # Send email confirmation
+                                # Counted in the same transaction as the result, so the cache stays exact
+                                if identity:
+                                    identity.attempt_count += 1
+                                email_result = identity.email if identity else None
+                                if email_result:
+                                    try:
+                                        enqueue(email_result, "Quiz Submission Confirmation", f"""Dear {username},
+                                        
+You have successfully submitted your quiz.
+Score: {score}/{len(paper)}
+Time Taken: {time_taken} seconds
+
+Thank you for participating.""")
+                                    except Exception as e:
+                                        st.error(f"Result email failed: {e}")
+                    
+                                update_student_status(username, "submitted", len(paper), len(paper))
+                                st.session_state.quiz_submitted = True
+                                st.success(f"Quiz submitted successfully! Your score is {score}/{len(paper)}")
+                                st.success("Quiz submitted successfully! check Your Mail")
+                                st.balloons()
+                                st.rerun()
+                                
+                            except Exception as e:
+                                st.error(f"Error saving results: {str(e)}")
+            except sqlite3.Error as e:
+                st.error(f"Database error: {str(e)}")
@@ -0,0 +1,153 @@
+"""View Recordings: paged galleries of proctoring segments and verification photos."""
+import os
+from datetime import datetime
+
+import streamlit as st
+
+from previews import (request_recording_previews, request_photo_thumbnail, ready_thumbnail,
+                      ready_proxy, remove_previews)
+from recordings import count_recordings, query_recordings, delete_recording
+from app_pages.common import PROFESSOR_SECRET_KEY, PHOTO_DIR
+
+
+def render():
+    if not st.session_state.get('recordings_verified', False):
+        secret_key = st.text_input("Enter Professor Secret Key to view recordings", type="password")
+        
+        if st.button("Verify Key"):
+            if secret_key == PROFESSOR_SECRET_KEY:
+                st.session_state.recordings_verified = True
+                st.rerun()
+            else:
+                st.error("Invalid secret key! Access denied.")
+    else:
+        st.subheader("Recorded Sessions")
+        
+        tab1, tab2 = st.tabs(["Videos", "Photos"])
+        
+        with tab1:
+            st.markdown("### Video Recordings")
+            try:
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    filter_user = st.text_input("Username", key="rec_filter_user").strip()
+                with col2:
+                    filter_section = st.text_input("Section", key="rec_filter_section").strip().upper()
+                with col3:
+                    filter_attempt = st.number_input("Attempt (0 = all)", min_value=0, value=0, step=1, key="rec_filter_attempt")
+
+                page_size = 20
+                total = count_recordings(filter_user, filter_section, filter_attempt)
+
+                if total:
+                    pages = (total + page_size - 1) // page_size
+                    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1, key="rec_page")
+                    rows = query_recordings(filter_user, filter_section, filter_attempt,
+                                            limit=page_size, offset=(page - 1) * page_size)
+                    st.caption(f"{total} segments")
+
+                    # Thumbnail gallery for this page; previews are built by a background worker pool
+                    gallery = st.columns(4)
+                    for i, row in enumerate(rows):
+                        if os.path.exists(row["path"]):
+                            request_recording_previews(row["path"])
+                        with gallery[i % 4]:
+                            thumb = ready_thumbnail(row["path"])
+                            if thumb:
+                                st.image(thumb, caption=f"#{row['id']} {row['username']}")
+                            else:
+                                st.caption(f"#{row['id']} {row['username']} (preview pending)")
+
+                    labels = {
+                        row["id"]: f"{row['username']} | {row['usn']} | {row['section']} | attempt {row['attempt']} | "
+                                   f"{datetime.fromtimestamp(row['start_time']).strftime('%Y-%m-%d %H:%M:%S')} | "
+                                   f"{row['frame_count']} frames"
+                        for row in rows
+                    }
+                    selected_id = st.selectbox("Select a video recording", list(labels), format_func=labels.get)
+                    selected = next(row for row in rows if row["id"] == selected_id)
+
+                    if os.path.exists(selected["path"]):
+                        proxy = ready_proxy(selected["path"])
+                        if proxy and not st.checkbox("Load original recording", key=f"rec_original_{selected_id}"):
+                            st.video(proxy)
+                        else:
+                            st.video(selected["path"])
+                    else:
+                        st.warning("Recording file is missing.")
+
+                    if st.button("Delete Selected Video"):
+                        try:
+                            remove_previews(selected["path"])
+                            delete_recording(selected_id)
+                            st.success("Video deleted successfully!")
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Error deleting video: {str(e)}")
+                else:
+                    st.warning("No video recordings available.")
+            except Exception as e:
+                st.error(f"Error accessing video recordings: {str(e)}")
+        
+        with tab2:
+            st.markdown("### Student Verification Photos")
+            try:
+                # Newest first; only the current page's thumbnails are shown
+                photo_entries = sorted((e for e in os.scandir(PHOTO_DIR) if e.name.endswith(".jpg")),
+                                       key=lambda e: e.stat().st_mtime, reverse=True)
+                photo_files = [e.name for e in photo_entries]
+                
+                if photo_files:
+                    page_size = 20
+                    pages = (len(photo_files) + page_size - 1) // page_size
+                    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1, key="photo_page")
+                    page_files = photo_files[(page - 1) * page_size:page * page_size]
+
+                    gallery = st.columns(4)
+                    for i, name in enumerate(page_files):
+                        path = os.path.join(PHOTO_DIR, name)
+                        request_photo_thumbnail(path)
+                        with gallery[i % 4]:
+                            thumb = ready_thumbnail(path)
+                            if thumb:
+                                st.image(thumb, caption=name)
+                            else:
+                                st.caption(f"{name} (preview pending)")
+
+                    selected_photo = st.selectbox("Select a photo", page_files)
+                    photo_path = os.path.join(PHOTO_DIR, selected_photo)
+                    
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        thumb = ready_thumbnail(photo_path)
+                        if thumb and not st.checkbox("Show full size", key=f"photo_original_{selected_photo}"):
+                            st.image(thumb, caption=selected_photo)
+                        else:
+                            st.image(photo_path, caption=selected_photo, use_column_width=True)
+                    
+                    with col2:
+                        st.write("Photo Details:")
+                        parts = selected_photo.split('_')
+                        if len(parts) >= 3:
+                            st.write(f"Username: {parts[0]}")
+                            st.write(f"USN: {parts[1]}")
+                            st.write(f"Timestamp: {'_'.join(parts[2:]).replace('.jpg', '')}")
+                        else:
+                            st.write("Unable to extract photo details.")
+
+                    if st.button("Delete Selected Photo"):
+                        try:
+                            os.remove(photo_path)
+                            remove_previews(photo_path)
+                            st.success("Photo deleted successfully!")
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Error deleting photo: {str(e)}")
+                else:
+                    st.warning("No student verification photos available.")
+            except Exception as e:
+                st.error(f"Error accessing photos: {str(e)}")
+
+        if st.button("Exit Recordings Panel"):
+            st.session_state.recordings_verified = False
+            st.rerun()
@@ -0,0 +1,49 @@
+"""Login and the per-session identity it produces.
+
+One query returns everything the pages need about a user (password hash, role,
+email, attempt count). The page keeps the resulting ``Identity`` in session state, so
+reruns read it from memory; it is dropped when the password changes and reloaded
+with the same single query.
+"""
+import hmac
+
+from db import query_one
+
+_IDENTITY_SQL = """SELECT u.username, u.password, COALESCE(u.role, 'student'), u.email,
+                          COALESCE(a.attempt_count, 0)
+                   FROM users u LEFT JOIN quiz_attempts a ON a.username = u.username
+                   WHERE u.username = ?"""
+
+
+class Identity:
+    """What the app knows about a logged-in user for the rest of the session"""
+
+    def __init__(self, username, role, email, attempt_count):
+        self.username = username
+        self.role = role
+        self.email = email
+        self.attempt_count = attempt_count
+
+    def __repr__(self):
+        return f"Identity({self.username!r}, role={self.role!r})"
+
+
+def _identity(row):
+    username, _, role, email, attempt_count = row
+    return Identity(username, role, email, attempt_count)
+
+
+def authenticate(username, password_hash, role=None):
+    """Returns the user's Identity if the password hash matches (and the role, if given), else None"""
+    row = query_one(_IDENTITY_SQL, (username,))
+    if not row or not row[1] or not hmac.compare_digest(row[1], password_hash):
+        return None
+    if role and row[2] != role:
+        return None
+    return _identity(row)
+
+
+def load_identity(username):
+    """Reloads an Identity without checking the password, for a user who is already logged in"""
+    row = query_one(_IDENTITY_SQL, (username,))
+    return _identity(row) if row else None
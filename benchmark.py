@@ -0,0 +1,446 @@
+"""Headless load benchmark that simulates an exam sitting.
+
+Each simulated student drives the real app script through Streamlit's AppTest, in its
+own process: AppTest swaps a mock into Streamlit's process-wide runtime for every run,
+so two overlapping runs in one process trip over each other. A student registers (with the emailed OTP), logs in, opens Take Quiz,
+takes the verification photo, answers every question on the paper and submits.
+Meanwhile professors poll the live board, making the same calls the Monitoring Panel
+makes. Everything runs against a scratch database and a local SMTP stand-in. The
+startup media prerender is off, so a background render doesn't compete with the
+students or outlive the scratch directory; questions show as text. Email goes out
+from one outbox worker in the benchmark's own process, and the professors run there
+too, so they pick up student changes on the poll timeout rather than the instant
+in-process wake-up the Monitoring Panel gets on a real server.
+
+The browser-only widgets cannot run headless, so they are swapped for stand-ins:
+- the WebRTC camera pushes synthetic frames through the real VideoProcessor and recorder;
+- camera_input returns a JPEG once the student takes the photo.
+
+    python benchmark.py --students 20 --professors 2 --save-baseline baseline.json
+    python benchmark.py --students 20 --professors 2 --compare baseline.json
+
+Output: p50/p95/p99 latency per step, SQLite pool and lock counters, growth of the
+database, photo and recording directories, and outbox delivery. Steps where the app
+raised or showed an error are failures (exit 1); anything else that goes wrong, such as
+a widget the script expected and didn't find or a worker process dying, is reported
+as a harness error (exit 2, and no baseline is saved).
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import socketserver
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_SCRIPT = os.path.join(HERE, "DEAN Academics-HOD.py")
+REGRESSION_TOLERANCE = 0.25  # Fail --compare when a step's p95 is this much slower than the baseline
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Minimal SMTP server that accepts and counts every message"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.messages = 0
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 localhost benchmark SMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith("DATA"):
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                with self.server.lock:
+                    self.server.messages += 1
+                self.reply("250 OK")
+            elif command.startswith("QUIT"):
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of an unsorted list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+def summarize(samples):
+    return {
+        step: {"count": len(values), "p50": percentile(values, 50), "p95": percentile(values, 95),
+               "p99": percentile(values, 99), "max": max(values)}
+        for step, values in sorted(samples.items()) if values
+    }
+
+
+def dir_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class AppFailure(Exception):
+    """The app itself raised or showed an error, as opposed to the harness going wrong"""
+
+
+class Recorder:
+    """Thread-safe latency samples, app failures and harness errors per step"""
+
+    def __init__(self):
+        self.samples = {}
+        self.failures = {}
+        self.harness_errors = {}
+        self.lock = threading.Lock()
+
+    def time(self, step, action):
+        start = time.perf_counter()
+        result = action()
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.samples.setdefault(step, []).append(elapsed)
+        return result
+
+    def fail(self, step, error):
+        with self.lock:
+            self.failures.setdefault(step, []).append(str(error)[:200])
+
+    def harness_error(self, step, error):
+        with self.lock:
+            self.harness_errors.setdefault(step, []).append(f"{type(error).__name__}: {error}"[:200])
+
+    def merge(self, other):
+        """Adds the samples, failures and harness errors of a Recorder sent back from a student process"""
+        with self.lock:
+            for mine, theirs in ((self.samples, other.samples), (self.failures, other.failures),
+                                 (self.harness_errors, other.harness_errors)):
+                for step, values in theirs.items():
+                    mine.setdefault(step, []).extend(values)
+
+    def __getstate__(self):
+        return {"samples": self.samples, "failures": self.failures, "harness_errors": self.harness_errors}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, lock=threading.Lock())
+
+
+def install_stand_ins(frames_per_rerun, photo_bytes):
+    """Replaces the browser-only widgets before the Take Quiz page is imported"""
+    import av
+    import numpy as np
+    import streamlit as st
+    import streamlit_webrtc
+
+    def webrtc_streamer(key, video_processor_factory=None, **kwargs):
+        # Like the real component, a stream lives as long as its key: a new key ends the old
+        # processor and builds a new one from the factory
+        stream = st.session_state.get("bench_stream")
+        if stream is not None and stream[0] != key:
+            stream[1].on_ended()
+            stream = st.session_state.bench_stream = None
+        if stream is None and video_processor_factory:
+            stream = st.session_state.bench_stream = (key, video_processor_factory())
+        if stream is not None:
+            for _ in range(frames_per_rerun):
+                img = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+                stream[1].recv(av.VideoFrame.from_ndarray(img, format="bgr24"))
+
+    class _Photo:
+        def getvalue(self):
+            return photo_bytes
+
+    def camera_input(label, **kwargs):
+        return _Photo() if st.session_state.get("bench_photo") else None
+
+    streamlit_webrtc.webrtc_streamer = webrtc_streamer
+    st.camera_input = camera_input
+
+
+def init_student_process(frames_per_rerun, photo_bytes):
+    """Prepares a spawned student process; the scratch settings come from the inherited environment"""
+    install_stand_ins(frames_per_rerun, photo_bytes)
+    # The benchmark's own process delivers email, so a student process never exits mid-send
+    import outbox
+    outbox.start_worker = lambda: None
+    # A long-running server has these loaded after its first visitors, so no student pays for them
+    import importlib
+    for page in ("app_pages.register", "app_pages.login", "app_pages.take_quiz"):
+        importlib.import_module(page)
+
+
+def check(at, step):
+    errors = [e.value for e in at.exception] + [e.value for e in at.error]
+    if errors:
+        raise AppFailure(f"{step}: {errors[0]}")
+    return at
+
+
+def button(at, label):
+    for b in at.button:
+        if b.label == label:
+            return b
+    raise LookupError(f"no {label!r} button on the page")
+
+
+def stats_delta(before, after):
+    return {name: after[name] - before.get(name, 0) for name in after}
+
+
+def run_student(n, seed):
+    """Runs one student in a student process; returns its Recorder, pool counters and run times"""
+    from streamlit.testing.v1 import AppTest
+    from db import db_stats
+
+    rec = Recorder()
+    stats_before = db_stats()
+    started = time.time()
+    rng = random.Random(seed + n)
+    username, password = f"bench{n:04d}", f"pw{n:04d}"
+    at = AppTest.from_file(APP_SCRIPT, default_timeout=120)
+    step = "open_app"
+    try:
+        rec.time(step, lambda: check(at.run(), step))
+
+        step = "register"
+
+        def register():
+            at.sidebar.selectbox[0].select("Register").run()
+            at.text_input[0].input(username)
+            at.text_input[1].input(f"{username}@example.com")
+            at.text_input[2].input(password)
+            button(at, "Send OTP").click().run()
+            at.text_input[3].input(at.session_state["reg_otp"])
+            return check(button(at, "Verify and Register").click().run(), step)
+        rec.time(step, register)
+
+        step = "login"
+
+        def login():
+            at.sidebar.selectbox[0].select("Login").run()
+            at.text_input[0].input(username)
+            at.text_input[1].input(password)
+            return check(button(at, "Login").click().run(), step)
+        rec.time(step, login)
+
+        step = "open_quiz"
+
+        def open_quiz():
+            at.sidebar.selectbox[0].select("Take Quiz").run()
+            at.text_input[0].input(f"1BM{n:05d}")
+            return check(at.text_input[1].input(f"S{n % 4}").run(), step)
+        rec.time(step, open_quiz)
+
+        step = "photo"
+
+        def photo():
+            at.session_state["bench_photo"] = True
+            return check(at.run(), step)
+        rec.time(step, photo)
+
+        paper = at.session_state["paper"]
+        for i in range(len(paper)):
+            step = "answer"
+            rec.time(step, lambda: check(at.radio[0].set_value(rng.randrange(len(at.radio[0].options))).run(), step))
+            if i < len(paper) - 1:
+                step = "next_question"
+                rec.time(step, lambda: check(button(at, "Next").click().run(), step))
+
+        step = "submit"
+        rec.time(step, lambda: check(button(at, "Submit Quiz").click().run(), step))
+        if not at.session_state["quiz_submitted"]:
+            raise AppFailure("submit: quiz was not recorded")
+    except AppFailure as e:
+        rec.fail(step, e)
+    except Exception as e:
+        rec.harness_error(step, e)
+    finally:
+        stream = at.session_state["bench_stream"] if "bench_stream" in at.session_state else None
+        if stream is not None:
+            stream[1].on_ended()
+    return rec, stats_delta(stats_before, db_stats()), (started, time.time())
+
+
+def run_professor(rec, stop, poll_seconds):
+    from presence import live_students
+    from changefeed import wait_for_change
+
+    version = -1
+    while not stop.is_set():
+        version = rec.time("monitor_wait", lambda: wait_for_change(version, timeout=poll_seconds))
+        rec.time("monitor_refresh", live_students)
+
+
+def compare(report, baseline_path):
+    """Prints p95 changes against a saved baseline; returns the steps that regressed"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressed = []
+    for step, stats in report["steps"].items():
+        old = baseline.get("steps", {}).get(step)
+        if not old:
+            continue
+        change = (stats["p95"] - old["p95"]) / old["p95"] if old["p95"] else 0.0
+        flag = ""
+        # Ignore sub-10ms jitter on very fast steps
+        if change > REGRESSION_TOLERANCE and stats["p95"] - old["p95"] > 0.01:
+            regressed.append(step)
+            flag = "  REGRESSED"
+        print(f"  {step:16s} p95 {old['p95'] * 1000:8.1f} -> {stats['p95'] * 1000:8.1f} ms ({change:+.0%}){flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate an exam sitting against the app, headlessly")
+    parser.add_argument("--students", type=int, default=10)
+    parser.add_argument("--professors", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Student processes running at once (default: one per student)")
+    parser.add_argument("--frames-per-rerun", type=int, default=3, help="Synthetic camera frames fed on each quiz rerun")
+    parser.add_argument("--poll-seconds", type=float, default=2.0, help="Professor board poll interval")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", metavar="JSON", help="Write the report here")
+    parser.add_argument("--compare", metavar="JSON", help="Compare p95 per step with a saved report")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="quiz_bench_")
+    sink = SMTPSink()
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+
+    # Module-level settings are read at import time, so point them at the scratch copies first
+    os.environ.update(QUIZ_DB_PATH=os.path.join(work_dir, "quiz_app.db"), SMTP_SERVER="127.0.0.1",
+                      SMTP_PORT=str(sink.port), SMTP_STARTTLS="0", EMAIL_SENDER="bench@localhost", EMAIL_PASSWORD="",
+                      PRERENDER_ON_START="0")
+    os.environ["TMPDIR"] = tempfile.tempdir = work_dir
+    sys.path.insert(0, HERE)
+
+    import cv2
+    import numpy as np
+    ok, photo = cv2.imencode(".jpg", np.full((480, 640, 3), 128, dtype=np.uint8))
+
+    from db import init_db, db_stats, query_one
+    from app_pages.common import PHOTO_DIR, RECORDING_DIR
+    from outbox import outbox_stats, start_worker
+    init_db()
+    start_worker()
+
+    rec = Recorder()
+    stop = threading.Event()
+    professors = [threading.Thread(target=run_professor, args=(rec, stop, args.poll_seconds), daemon=True)
+                  for _ in range(args.professors)]
+    for thread in professors:
+        thread.start()
+
+    # Spawned, not forked: this process already has threads and open database connections
+    stats = {}
+    spans = []
+    with ProcessPoolExecutor(max_workers=args.concurrency or args.students,
+                             mp_context=multiprocessing.get_context("spawn"),
+                             initializer=init_student_process,
+                             initargs=(args.frames_per_rerun, photo.tobytes())) as pool:
+        futures = [pool.submit(run_student, n, args.seed) for n in range(args.students)]
+        for future in as_completed(futures):
+            try:
+                student_rec, student_stats, span = future.result()
+            except Exception as e:
+                rec.harness_error("student_process", e)
+                continue
+            rec.merge(student_rec)
+            spans.append(span)
+            for name, value in student_stats.items():
+                stats[name] = stats.get(name, 0) + value
+    stop.set()
+    # From the first student starting to the last finishing, leaving out process start-up
+    wall = max(end for _, end in spans) - min(begin for begin, _ in spans) if spans else 0.0
+    for name, value in db_stats().items():
+        stats[name] = stats.get(name, 0) + value
+
+    # Give the outbox worker a moment to deliver what was queued
+    deadline = time.time() + 30
+    while outbox_stats().get("pending") and time.time() < deadline:
+        time.sleep(0.5)
+
+    db_path = os.environ["QUIZ_DB_PATH"]
+    report = {
+        "config": {"students": args.students, "professors": args.professors,
+                   "concurrency": args.concurrency or args.students, "frames_per_rerun": args.frames_per_rerun},
+        "wall_seconds": wall,
+        "steps": summarize(rec.samples),
+        "failures": rec.failures,
+        "harness_errors": rec.harness_errors,
+        "db": stats,
+        "growth": {
+            "results_rows": query_one("SELECT COUNT(*) FROM results")[0],
+            "db_bytes": sum(os.path.getsize(p) for p in (db_path, db_path + "-wal") if os.path.exists(p)),
+            "photo_bytes": dir_bytes(PHOTO_DIR),
+            "recording_bytes": dir_bytes(RECORDING_DIR),
+        },
+        "email": {"outbox": outbox_stats(), "delivered": sink.messages},
+    }
+
+    print(f"{args.students} students, {args.professors} professors in {wall:.1f}s")
+    print(f"  {'step':16s} {'count':>6s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    for step, stats in report["steps"].items():
+        print(f"  {step:16s} {stats['count']:6d} {stats['p50'] * 1000:9.1f} {stats['p95'] * 1000:9.1f} "
+              f"{stats['p99'] * 1000:9.1f}")
+    db = report["db"]
+    print(f"SQLite: {db['transactions']} transactions, lock wait {db['lock_wait_seconds']:.3f}s, "
+          f"{db['lock_errors']} lock errors, pool wait {db['pool_wait_seconds']:.3f}s")
+    print(f"Growth: {json.dumps(report['growth'])}")
+    print(f"Email: {json.dumps(report['email'])}")
+    for step, errors in rec.failures.items():
+        print(f"FAILED {step} x{len(errors)}: {errors[0]}")
+    for step, errors in rec.harness_errors.items():
+        print(f"HARNESS ERROR {step} x{len(errors)}: {errors[0]}")
+
+    if args.save_baseline and rec.harness_errors:
+        print(f"Not saving a baseline to {args.save_baseline}: the harness itself failed")
+    elif args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    status = 2 if rec.harness_errors else 1 if rec.failures else 0
+    if args.compare:
+        print(f"Compared with {args.compare}:")
+        if compare(report, args.compare):
+            status = max(status, 1)
+
+    sink.shutdown()
+    if args.keep:
+        print(f"Scratch files kept in {work_dir}")
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""One-time, per-process startup for the app.
+
+Streamlit re-executes the page script on every interaction, but imported modules stay
+loaded, so ``bootstrap()`` does its work on the first run in a process and returns
+immediately on every rerun after that.
+
+Question videos are rendered by ``python media.py`` in a separate process. Its render
+pool uses spawn, and spawned workers re-import ``__main__``; inside Streamlit that is
+the page script, so starting the pool from the server process would re-run the app in
+every worker. Set ``PRERENDER_ON_START=0`` to skip it, e.g. for headless checks that
+run against a scratch database.
+"""
+import os
+import sys
+import subprocess
+import threading
+
+from db import init_db
+from questionbank import seed_bank
+from outbox import start_worker
+from tracing import start_exporter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PRERENDER_ON_START = os.environ.get("PRERENDER_ON_START", "1") != "0"
+
+_started = False
+_lock = threading.Lock()
+
+
+def start_prerender():
+    """Renders all question videos in a background process, off the server entirely"""
+    return subprocess.Popen([sys.executable, os.path.join(HERE, "media.py")],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def bootstrap(directories=()):
+    """Migrates the database, seeds the question bank and starts background workers, once"""
+    global _started
+    if _started:
+        return
+    with _lock:
+        if _started:
+            return
+        init_db()
+        seed_bank()
+        for directory in directories:
+            os.makedirs(directory, exist_ok=True)
+        if PRERENDER_ON_START:
+            start_prerender()
+        # Background email sender
+        start_worker()
+        # Periodic metrics file, when METRICS_DIR is set
+        start_exporter("app")
+        _started = True
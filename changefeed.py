@@ -0,0 +1,62 @@
+"""Version-stamped feed of quiz events (started, photo taken, answered, submitted).
+
+Every event gets an increasing id in the ``events`` table; the highest id is the feed
+version. Watchers block in ``wait_for_change`` until the version moves past the one
+they last drew, instead of re-running the whole page on a timer. Writers in this
+process wake watchers immediately; the database version is the source of truth, so
+events from other processes are picked up on the next timeout. Only the version is
+ever read back, so events older than ``EVENT_RETENTION`` are trimmed.
+"""
+import time
+import threading
+
+from db import connection, transaction
+
+EVENT_RETENTION = 3600  # Seconds of events kept; ids are AUTOINCREMENT, so trimmed ids are never reused
+
+_changed = threading.Condition()
+_generation = 0  # Bumped on every local publish; watchers wake when it moves
+
+
+def publish(username, kind, detail=None, conn=None):
+    """Appends an event and wakes any watchers; pass conn to publish inside a caller's transaction"""
+    global _generation
+    if conn is None:
+        with transaction() as conn:
+            return publish(username, kind, detail, conn)
+
+    version = conn.execute(
+        "INSERT INTO events (username, kind, detail, created) VALUES (?, ?, ?, ?)",
+        (username, kind, detail, time.time())
+    ).lastrowid
+
+    with _changed:
+        _generation += 1
+        _changed.notify_all()
+    return version
+
+
+def current_version():
+    with connection() as conn:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+
+def wait_for_change(since, timeout=2.0):
+    """Blocks until an event is published here or timeout passes; returns the current version.
+
+    A wake-up only prompts a re-read of the version, so events whose transaction has not
+    committed yet (or rolled back) are never reported early.
+    """
+    version = current_version()
+    if version != since:
+        return version
+    with _changed:
+        generation = _generation
+        _changed.wait_for(lambda: _generation != generation, timeout)
+    return current_version()
+
+
+def trim(max_age=EVENT_RETENTION):
+    """Deletes events older than max_age seconds"""
+    with transaction() as conn:
+        conn.execute("DELETE FROM events WHERE created < ?", (time.time() - max_age,))
@@ -0,0 +1,208 @@
+"""SQLite access layer shared by the app and its background workers.
+
+Connections come from a small process-wide pool and are tuned once when opened (WAL,
+busy_timeout, synchronous=NORMAL, page cache and mmap sizes). Each keeps its own
+prepared-statement cache, which stays warm because the connection is reused.
+Streamlit runs every rerun on a fresh thread, so connections are pooled per process
+and handed to one thread at a time rather than pinned to a thread.
+
+    with connection() as conn:        # reads, autocommit
+        conn.execute("SELECT ...")
+
+    with transaction() as conn:       # BEGIN IMMEDIATE ... COMMIT, rolled back on error
+        conn.execute("INSERT ...")
+"""
+import os
+import time
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from tracing import span, register_gauge
+
+DB_PATH = os.environ.get("QUIZ_DB_PATH", 'quiz_app.db')
+
+POOL_SIZE = 8
+POOL_TIMEOUT = 30  # Seconds to wait for a free connection
+BUSY_TIMEOUT_MS = 5000
+CACHED_STATEMENTS = 256
+
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",  # Better concurrency handling
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA synchronous=NORMAL",  # Safe with WAL; fsync only at checkpoints
+    "PRAGMA cache_size=-16000",  # 16 MB page cache per connection
+    "PRAGMA mmap_size=268435456",  # 256 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+]
+
+
+class ConnectionPool:
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"opened": 0, "checkouts": 0, "pool_wait_seconds": 0.0,
+                      "transactions": 0, "lock_wait_seconds": 0.0, "lock_errors": 0}
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None,
+                               cached_statements=CACHED_STATEMENTS)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        self.record("opened")
+        return conn
+
+    def record(self, name, amount=1):
+        """Adds to a stats counter; connections are borrowed from many threads at once"""
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def acquire(self):
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._opened < self.size
+                if create:
+                    self._opened += 1
+            if create:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=POOL_TIMEOUT)
+                except queue.Empty:
+                    # Surfaces like any other busy database, so pages' sqlite3.Error handlers report it
+                    self.record("pool_wait_seconds", time.perf_counter() - start)
+                    raise sqlite3.OperationalError(
+                        f"No free database connection after {POOL_TIMEOUT}s ({self.size} in use)") from None
+        self.record("checkouts")
+        self.record("pool_wait_seconds", time.perf_counter() - start)
+        return conn
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._opened = 0
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None or _pool.path != DB_PATH:
+        with _pool_lock:
+            if _pool is None or _pool.path != DB_PATH:
+                _pool = ConnectionPool(DB_PATH)
+    return _pool
+
+
+@contextmanager
+def _borrow():
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+@contextmanager
+def connection():
+    """Borrows a pooled connection in autocommit mode"""
+    with span("db.connection"), _borrow() as conn:
+        yield conn
+
+
+@contextmanager
+def transaction():
+    """Borrows a pooled connection and runs the block in one BEGIN IMMEDIATE transaction"""
+    pool = get_pool()
+    with span("db.transaction"), _borrow() as conn:
+        start = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            pool.record("lock_errors")
+            raise
+        finally:
+            # Time spent waiting for the write lock (busy_timeout) shows up here
+            pool.record("lock_wait_seconds", time.perf_counter() - start)
+        pool.record("transactions")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def db_stats():
+    """Pool and lock counters, for diagnosing contention under load"""
+    pool = get_pool()
+    with pool._stats_lock:
+        return dict(pool.stats)
+
+
+for _name in ("opened", "checkouts", "pool_wait_seconds", "transactions", "lock_wait_seconds", "lock_errors"):
+    register_gauge(f"db.{_name}", lambda name=_name: get_pool().stats[name])
+
+
+def query_one(sql, params=()):
+    with connection() as conn:
+        return conn.execute(sql, params).fetchone()
+
+
+def query_all(sql, params=()):
+    with connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def execute(sql, params=()):
+    """Runs a single write statement in its own transaction; returns the cursor's rowcount"""
+    with transaction() as conn:
+        return conn.execute(sql, params).rowcount
+
+
+_migrated = set()  # Database paths already brought up to date by this process
+_migrate_lock = threading.Lock()
+
+
+def init_db():
+    """Brings the schema up to date once per process; later calls (every rerun) return immediately"""
+    if DB_PATH in _migrated:
+        return []
+    from migrations import migrate, current_version, latest_version
+    with _migrate_lock:
+        if DB_PATH in _migrated:
+            return []
+        with connection() as conn:
+            # Cheap read first, so an up-to-date database never takes the write lock
+            up_to_date = current_version(conn) >= latest_version()
+        applied = []
+        if not up_to_date:
+            with transaction() as conn:
+                applied = migrate(conn)
+        _migrated.add(DB_PATH)
+        return applied
@@ -0,0 +1,95 @@
+"""Streaming results export in CSV or Parquet.
+
+Results are read from SQLite in chunks and written as they arrive, so an export never
+holds the whole result set in memory. Parquet output is a dataset partitioned by
+Section (``Section=A/part-0-0.parquet`` ...), so downstream tools can read one section
+without scanning the rest. Parquet needs pyarrow.
+
+    python export.py --format csv --out results.csv [--section A]
+    python export.py --format parquet --out results_parquet/
+"""
+import os
+import shutil
+import argparse
+import tempfile
+
+from results import COLUMNS, iter_results
+from tracing import traced
+
+CHUNK_SIZE = 5000
+
+
+def write_csv(path, chunksize=CHUNK_SIZE, **filters):
+    """Writes matching results to a CSV file chunk by chunk; returns the row count"""
+    rows = 0
+    with open(path, "w", newline="") as f:
+        for i, chunk in enumerate(iter_results(chunksize=chunksize, **filters)):
+            chunk.to_csv(f, index=False, header=(i == 0))
+            rows += len(chunk)
+        if rows == 0:
+            f.write(",".join(COLUMNS) + "\n")
+    return rows
+
+
+def write_parquet(out_dir, chunksize=CHUNK_SIZE, **filters):
+    """Writes matching results as a Parquet dataset partitioned by Section; returns the row count"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+
+    # Build next to the target and swap in, so readers never see a half-written dataset
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".export-", dir=parent)
+    rows = 0
+    try:
+        for i, chunk in enumerate(iter_results(chunksize=chunksize, **filters)):
+            chunk["Section"] = chunk["Section"].fillna("")
+            pq.write_to_dataset(
+                pa.Table.from_pandas(chunk, preserve_index=False),
+                root_path=tmp_dir,
+                partition_cols=["Section"],
+                basename_template=f"part-{i}-{{i}}.parquet",
+            )
+            rows += len(chunk)
+        if os.path.exists(out_dir):
+            shutil.rmtree(out_dir)
+        os.replace(tmp_dir, out_dir)
+    finally:
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+    return rows
+
+
+@traced("file.export")
+def export_file(fmt, work_dir, **filters):
+    """Exports to a single downloadable file in work_dir: CSV, or a zip of the Parquet dataset"""
+    if fmt == "csv":
+        path = os.path.join(work_dir, "results.csv")
+        write_csv(path, **filters)
+        return path
+
+    dataset = os.path.join(work_dir, "results_parquet")
+    write_parquet(dataset, **filters)
+    return shutil.make_archive(dataset, "zip", dataset)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export quiz results")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--out", required=True, help="CSV file, or directory for the Parquet dataset")
+    parser.add_argument("--section", help="Only export this section")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.format == "csv":
+        rows = write_csv(args.out, chunksize=args.chunksize, section=args.section)
+    else:
+        rows = write_parquet(args.out, chunksize=args.chunksize, section=args.section)
+    print(f"Exported {rows} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
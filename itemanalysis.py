@@ -0,0 +1,181 @@
+"""Bulk regrading and item analysis over stored responses.
+
+Responses are loaded into one int8 matrix, submissions x questions, holding the
+chosen option index, ``UNANSWERED`` for a skipped question and ``NOT_SHOWN`` for a
+question that was not on that student's paper. Scoring against a key and the
+per-question statistics are whole-matrix NumPy operations, so a semester of
+submissions is handled in one pass.
+
+    python itemanalysis.py --report [--section A]
+    python itemanalysis.py --set-answer 12=2 --regrade
+"""
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from db import connection, transaction
+from results import _filters
+from aggregates import rebuild_aggregates
+
+NOT_SHOWN = -2
+UNANSWERED = -1
+
+
+def load_responses(section=None, date_from=None, date_to=None):
+    """Returns (result ids, question id per column, int8 response matrix)"""
+    where, params = _filters(section, date_from=date_from, date_to=date_to)
+    with connection() as conn:
+        rows = conn.execute(
+            f"""SELECT r.id, s.question_ids, s.choices FROM results r
+                JOIN responses s ON s.result_id = r.id {where}
+                ORDER BY r.id""",
+            params
+        ).fetchall()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32), np.empty((0, 0), dtype=np.int8)
+
+    result_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    qids = [np.frombuffer(row[1], dtype=np.int32) for row in rows]
+    choices = np.concatenate([np.frombuffer(row[2], dtype=np.int8) for row in rows])
+    lengths = np.fromiter((len(q) for q in qids), dtype=np.int64, count=len(qids))
+    qids = np.concatenate(qids)
+
+    columns, col_index = np.unique(qids, return_inverse=True)
+    matrix = np.full((len(rows), len(columns)), NOT_SHOWN, dtype=np.int8)
+    matrix[np.repeat(np.arange(len(rows)), lengths), col_index] = choices
+    return result_ids, columns, matrix
+
+
+def key_for(columns, answer_key):
+    """Correct option per matrix column, from an id-indexed key (e.g. QuestionBank.answer_key)"""
+    return np.frombuffer(answer_key, dtype=np.int8)[columns] if len(columns) else np.empty(0, dtype=np.int8)
+
+
+def score_matrix(matrix, key):
+    """Boolean matrix of correct answers; NOT_SHOWN and UNANSWERED never match a key"""
+    return matrix == key[np.newaxis, :]
+
+
+def regrade(matrix, key):
+    return score_matrix(matrix, key).sum(axis=1)
+
+
+def item_statistics(matrix, key, max_options=None):
+    """Per-question difficulty, discrimination and option counts.
+
+    difficulty is the share of students shown the question who got it right;
+    discrimination is the point-biserial correlation between getting it right and the
+    rest of the student's score; options[:, k] counts how often option k was chosen.
+    """
+    shown = matrix != NOT_SHOWN
+    correct = score_matrix(matrix, key).astype(np.float64)
+    n = shown.sum(axis=0)
+    safe_n = np.maximum(n, 1)
+
+    difficulty = correct.sum(axis=0) / safe_n
+
+    # Rest score: the student's total without this item, only where the item was shown
+    rest = (correct.sum(axis=1)[:, np.newaxis] - correct) * shown
+    mean_x = correct.sum(axis=0) / safe_n
+    mean_y = rest.sum(axis=0) / safe_n
+    dx = (correct - mean_x) * shown
+    dy = (rest - mean_y) * shown
+    cov = (dx * dy).sum(axis=0)
+    denom = np.sqrt((dx * dx).sum(axis=0) * (dy * dy).sum(axis=0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        discrimination = np.where(denom > 0, cov / denom, np.nan)
+
+    answered = matrix >= 0
+    max_options = max_options or (int(matrix.max()) + 1 if answered.any() else 1)
+    col = np.broadcast_to(np.arange(matrix.shape[1]), matrix.shape)[answered]
+    options = np.bincount(col * max_options + matrix[answered], minlength=matrix.shape[1] * max_options)
+    options = options.reshape(matrix.shape[1], max_options)
+
+    skipped = (matrix == UNANSWERED).sum(axis=0)
+    return {"shown": n, "difficulty": difficulty, "discrimination": discrimination,
+            "options": options, "skipped": skipped}
+
+
+def item_report(bank, section=None, date_from=None, date_to=None):
+    """Item analysis for every question that appears in the stored responses, as a DataFrame"""
+    _, columns, matrix = load_responses(section, date_from, date_to)
+    if not len(columns):
+        return pd.DataFrame()
+    key = key_for(columns, bank.answer_key)
+    max_options = max(len(bank.get(int(qid))["options"]) for qid in columns)
+    stats = item_statistics(matrix, key, max_options)
+
+    report = pd.DataFrame({
+        "Question_ID": columns,
+        "Question": [bank.get(int(qid))["question"] for qid in columns],
+        "Topic": [bank.get(int(qid))["topic"] for qid in columns],
+        "Shown": stats["shown"],
+        "Difficulty": stats["difficulty"].round(3),
+        "Discrimination": stats["discrimination"].round(3),
+        "Answer": key,
+        "Skipped": stats["skipped"],
+    })
+    for k in range(max_options):
+        report[f"Option_{k}"] = stats["options"][:, k]
+    return report
+
+
+def regrade_results(bank, section=None):
+    """Rescores every stored response against the bank's current key.
+
+    Updates the scores that changed and rebuilds the aggregates; returns
+    (results checked, results changed, seconds spent grading).
+    """
+    result_ids, columns, matrix = load_responses(section)
+    if not len(result_ids):
+        return 0, 0, 0.0
+
+    start = time.perf_counter()
+    scores = regrade(matrix, key_for(columns, bank.answer_key))
+    elapsed = time.perf_counter() - start
+
+    with transaction() as conn:
+        old = dict(conn.execute(
+            "SELECT id, score FROM results WHERE id IN (SELECT result_id FROM responses)"
+        ).fetchall())
+        changed = [(int(score), int(rid)) for rid, score in zip(result_ids, scores) if old.get(int(rid)) != score]
+        conn.executemany("UPDATE results SET score = ? WHERE id = ?", changed)
+        if changed:
+            from questionbank import paper_size
+            # Results keep their own max_score; paper_size() only covers any stored without one
+            rebuild_aggregates(conn, paper_size())
+    return len(result_ids), len(changed), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Item analysis and bulk regrading of quiz responses")
+    parser.add_argument("--report", action="store_true", help="Print difficulty, discrimination and option counts")
+    parser.add_argument("--section", help="Limit to one section")
+    parser.add_argument("--set-answer", action="append", default=[], metavar="QID=OPTION",
+                        help="Correct a question's answer key (option index) before regrading")
+    parser.add_argument("--regrade", action="store_true", help="Rescore stored responses against the current key")
+    args = parser.parse_args()
+
+    from db import init_db
+    from questionbank import seed_bank, get_bank, set_answer
+    init_db()
+    seed_bank()
+
+    for spec in args.set_answer:
+        qid, option = spec.split("=")
+        set_answer(int(qid), int(option))
+        print(f"Question {qid}: answer set to option {option}")
+
+    bank = get_bank()
+    if args.regrade or args.set_answer:
+        checked, changed, elapsed = regrade_results(bank, args.section)
+        print(f"Regraded {checked} submissions in {elapsed * 1000:.1f} ms; {changed} scores changed")
+    if args.report or not (args.regrade or args.set_answer):
+        with pd.option_context("display.max_columns", None, "display.width", 200):
+            print(item_report(bank, args.section).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
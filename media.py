@@ -0,0 +1,335 @@
+"""Question media rendering (audio + video) shared by the app and the pre-render CLI.
+
+Run ``python media.py`` before an exam to build every question video up front:
+
+    python media.py --workers 4
+
+``python media.py --benchmark`` compares the encoder against the old OpenCV + moviepy path,
+and ``python media.py --evict`` trims the media cache down to its quota.
+"""
+import os
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+from media_cache import MediaCache, cache_key
+from tts import get_engine, synthesize
+from tracing import traced, flush
+
+VIDEO_DIR = os.path.join(tempfile.gettempdir(), "videos")
+
+TTS_LANG = 'en'
+ENCODER_VERSION = 2  # Bump whenever the encoder output changes, to invalidate cached videos
+
+CACHE = MediaCache(VIDEO_DIR)
+
+CARD_SIZE = (640, 480)
+CARD_BACKGROUND = (255, 223, 186)
+CARD_TEXT_COLOR = (0, 0, 255)
+CARD_MARGIN = 30
+VIDEO_FPS = 10
+
+
+def wrap_text(text, font, scale, thickness, max_width):
+    """Splits text into lines that fit within max_width pixels"""
+    lines = []
+    current = ""
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if current and cv2.getTextSize(candidate, font, scale, thickness)[0][0] > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def draw_question_card(question_text):
+    """Draws the still frame shown for a question, with long text wrapped and centred"""
+    width, height = CARD_SIZE
+    img = np.full((height, width, 3), CARD_BACKGROUND, dtype=np.uint8)
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    scale, thickness = 1, 2
+
+    lines = wrap_text(question_text, font, scale, thickness, width - 2 * CARD_MARGIN)
+    line_height = cv2.getTextSize("Ag", font, scale, thickness)[0][1] + 15
+    y = (height - line_height * len(lines)) // 2 + line_height
+
+    for line in lines:
+        text_width = cv2.getTextSize(line, font, scale, thickness)[0][0]
+        x = max(CARD_MARGIN, (width - text_width) // 2)
+        cv2.putText(img, line, (x, y), font, scale, CARD_TEXT_COLOR, thickness, cv2.LINE_AA)
+        y += line_height
+    return img
+
+
+def ffmpeg_exe():
+    import imageio_ffmpeg
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+@traced("media.encode")
+def encode_question_video(question_text, audio_file, output_path):
+    """Encodes the question card and its audio into an mp4 with a single ffmpeg pass.
+
+    The card is drawn once and looped as a still image for as long as the audio plays.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        card_path = os.path.join(temp_dir, "card.png")
+        cv2.imwrite(card_path, draw_question_card(question_text))
+
+        cmd = [
+            ffmpeg_exe(), "-y", "-loglevel", "error",
+            "-loop", "1", "-framerate", str(VIDEO_FPS), "-i", card_path,
+            "-i", audio_file,
+            "-c:v", "libx264", "-tune", "stillimage", "-pix_fmt", "yuv420p",
+            "-c:a", "aac",
+            "-shortest",
+            output_path,
+        ]
+        proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed: {proc.stderr.decode(errors='replace').strip()}")
+    return output_path
+
+
+def encode_question_video_legacy(question_text, audio_file, output_path):
+    """The previous OpenCV + moviepy double encode, kept for benchmarking"""
+    import moviepy.editor as mp
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_video_path = os.path.join(temp_dir, "temp_video.mp4")
+        temp_audio_path = os.path.join(temp_dir, "temp_audio.mp3")
+
+        # Step 1: Create silent video
+        width, height = 640, 480
+        img = np.full((height, width, 3), (255, 223, 186), dtype=np.uint8)
+        font = cv2.FONT_HERSHEY_SIMPLEX
+
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(temp_video_path, fourcc, 10, (width, height))
+
+        for _ in range(50):  # 5 seconds of video at 10fps
+            img_copy = img.copy()
+            text_size = cv2.getTextSize(question_text, font, 1, 2)[0]
+            text_x = (width - text_size[0]) // 2
+            text_y = (height + text_size[1]) // 2
+            cv2.putText(img_copy, question_text, (text_x, text_y), font, 1, (0, 0, 255), 2, cv2.LINE_AA)
+            out.write(img_copy)
+        out.release()
+
+        # Step 2: Copy audio to temp location
+        shutil.copy(audio_file, temp_audio_path)
+
+        # Step 3: Combine video and audio
+        video_clip = mp.VideoFileClip(temp_video_path)
+        audio_clip = mp.AudioFileClip(temp_audio_path)
+        try:
+            # Ensure audio duration matches video
+            if audio_clip.duration > video_clip.duration:
+                audio_clip = audio_clip.subclip(0, video_clip.duration)
+
+            final_video = video_clip.set_audio(audio_clip)
+            final_video.write_videofile(
+                output_path,
+                codec='libx264',
+                fps=10,
+                audio_codec='aac',
+                threads=4,
+                logger=None  # Disable verbose output
+            )
+            final_video.close()
+        finally:
+            # Explicitly close clips to release resources
+            video_clip.close()
+            audio_clip.close()
+    return output_path
+
+
+def audio_key(question_text, lang=TTS_LANG, engine=None):
+    return cache_key("audio", question_text, lang=lang, engine=engine or get_engine().name)
+
+
+def video_key(question_text, lang=TTS_LANG, engine=None):
+    # The audio track depends on the TTS engine, so the video does too
+    return cache_key(
+        "video", question_text, lang=lang, engine=engine or get_engine().name,
+        size=CARD_SIZE, background=CARD_BACKGROUND, text_color=CARD_TEXT_COLOR,
+        margin=CARD_MARGIN, fps=VIDEO_FPS, encoder=ENCODER_VERSION,
+    )
+
+
+def generate_audio(question_text, lang=TTS_LANG, engine=None):
+    engine = engine or get_engine()
+
+    def produce(path):
+        synthesize(engine, question_text, path, lang=lang)
+
+    return CACHE.get_or_create(audio_key(question_text, lang, engine.name), ".mp3", produce)
+
+
+def generate_audio_batch(question_texts, lang=TTS_LANG, engine=None, max_workers=4):
+    """Synthesizes audio for many questions concurrently.
+
+    Returns a list in the same order holding each audio path, or the exception raised for it.
+    """
+    engine = engine or get_engine()
+
+    def run(question_text):
+        try:
+            return generate_audio(question_text, lang, engine)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(run, question_texts))
+
+
+def create_video(question_text, audio_file, lang=TTS_LANG):
+    def produce(path):
+        encode_question_video(question_text, audio_file, path)
+
+    return CACHE.get_or_create(video_key(question_text, lang), ".mp4", produce)
+
+
+@traced("media.ready_video")
+def ready_video(question_text, lang=TTS_LANG):
+    """Returns the finished video for a question, or None if it is not rendered yet"""
+    return CACHE.get(video_key(question_text, lang), ".mp4")
+
+
+def _cpu_seconds():
+    # This process plus finished children (ffmpeg runs as a subprocess in both paths)
+    import resource
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def benchmark(question_text, runs=3):
+    """Compares wall time and CPU time of the single-pass and legacy encoders.
+
+    Uses a generated tone instead of gTTS so it runs offline.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        audio_file = os.path.join(temp_dir, "tone.mp3")
+        subprocess.run(
+            [ffmpeg_exe(), "-y", "-loglevel", "error", "-f", "lavfi",
+             "-i", "sine=frequency=440:duration=5", audio_file],
+            check=True,
+        )
+
+        encoders = [("single-pass", encode_question_video), ("legacy", encode_question_video_legacy)]
+        for name, encoder in encoders:
+            wall, cpu = [], []
+            for run in range(runs):
+                output_path = os.path.join(temp_dir, f"{name}_{run}.mp4")
+                wall_start, cpu_start = time.perf_counter(), _cpu_seconds()
+                encoder(question_text, audio_file, output_path)
+                wall.append(time.perf_counter() - wall_start)
+                cpu.append(_cpu_seconds() - cpu_start)
+            results[name] = {"wall": min(wall), "cpu": min(cpu)}
+    return results
+
+
+@traced("media.render_question")
+def render_question(question_text, lang=TTS_LANG):
+    """Builds the audio and final video for one question, at most once across processes"""
+    path = ready_video(question_text, lang)
+    if path:
+        return path
+
+    audio_file = generate_audio(question_text, lang)
+    return create_video(question_text, audio_file, lang)
+
+
+def prerender_questions(questions, workers=None):
+    """Renders the whole question bank in a process pool.
+
+    Takes question bank entries and returns a dict of question id -> video path, or the
+    exception raised for it.
+    """
+    results = {}
+    pending = {}
+    for question in questions:
+        path = CACHE.path(video_key(question["question"]), ".mp4")
+        if os.path.exists(path):
+            results[question["id"]] = path
+        else:
+            pending[question["id"]] = question["question"]
+    if not pending:
+        return results
+
+    # Synthesis is network/IO bound, so batch it on threads before the CPU-bound encodes
+    generate_audio_batch(list(pending.values()))
+
+    # spawn keeps workers independent of the parent's threads. Spawned workers re-import
+    # __main__, so call this from the CLI (bootstrap runs it as a subprocess), never from
+    # inside Streamlit, where __main__ is the page script.
+    ctx = multiprocessing.get_context("spawn")
+    workers = workers or min(len(pending), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = {pool.submit(render_question, text): qid for qid, text in pending.items()}
+        for future in as_completed(futures):
+            qid = futures[future]
+            try:
+                results[qid] = future.result()
+            except Exception as e:
+                results[qid] = e
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render audio and video for every quiz question")
+    parser.add_argument("--workers", type=int, default=None, help="Number of render processes (default: CPU count)")
+    parser.add_argument("--benchmark", action="store_true", help="Compare the single-pass encoder with the legacy one and exit")
+    parser.add_argument("--evict", action="store_true", help="Evict least recently used media down to the quota and exit")
+    args = parser.parse_args()
+
+    if args.evict:
+        CACHE.evict()
+        print(json.dumps(CACHE.stats(), indent=2))
+        return 0
+
+    if args.benchmark:
+        from questions import QUESTIONS
+        results = benchmark(QUESTIONS[0]["question"])
+        for name, timing in results.items():
+            print(f"{name:12s} wall {timing['wall']:.2f}s  cpu {timing['cpu']:.2f}s")
+        fast, slow = results["single-pass"], results["legacy"]
+        print(f"speedup      wall {slow['wall'] / fast['wall']:.1f}x  cpu {slow['cpu'] / fast['cpu']:.1f}x")
+        return 0
+
+    from db import init_db
+    from questionbank import seed_bank, get_bank
+    init_db()
+    seed_bank()
+
+    start = time.time()
+    results = prerender_questions(get_bank().active_questions(), workers=args.workers)
+    failed = 0
+    for qid in sorted(results):
+        result = results[qid]
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"Question {qid}: FAILED ({result})")
+        else:
+            print(f"Question {qid}: {result}")
+    print(f"Rendered {len(results) - failed}/{len(results)} questions in {time.time() - start:.1f}s")
+    print(json.dumps(CACHE.stats(), indent=2))
+    flush("prerender")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,197 @@
+"""Content-addressed cache for rendered question media.
+
+Files are stored as ``<key><ext>`` where the key is a hash of everything that
+affects the output (question text, TTS language, render parameters), so editing a
+question can never serve stale media. A JSON manifest tracks size, last access and
+render time per entry, and least-recently-used entries are evicted once the cache
+grows past its disk quota.
+"""
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from tracing import count
+
+DEFAULT_QUOTA_MB = int(os.environ.get("MEDIA_CACHE_QUOTA_MB", "1024"))
+
+LOCK_TIMEOUT = 600  # Seconds to wait for another process producing the same entry
+LOCK_STALE_AFTER = 900  # A lock older than this belongs to a crashed process
+ACCESS_WRITE_INTERVAL = 60  # Only persist a new last-access time this often per entry
+
+
+@contextmanager
+def file_lock(lock_path, timeout=LOCK_TIMEOUT):
+    """Cross-process lock based on exclusive creation of a lock file"""
+    deadline = time.time() + timeout
+
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_AFTER:
+                    os.remove(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f"Timed out waiting for lock {lock_path}")
+            time.sleep(0.05)
+
+    try:
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+
+
+def partial_path(path):
+    # Keep the real extension last so ffmpeg can still infer the container
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}-{uuid.uuid4().hex[:8]}.partial{ext}"
+
+
+def cache_key(*parts, **params):
+    """Stable hash of the given values and keyword parameters"""
+    payload = json.dumps([parts, sorted(params.items())], ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class MediaCache:
+    def __init__(self, root, quota_bytes=DEFAULT_QUOTA_MB * 1024 * 1024):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key, ext):
+        return os.path.join(self.root, f"{key}{ext}")
+
+    @contextmanager
+    def lock(self, key):
+        """Held while an entry is being produced, so it is only produced once"""
+        with file_lock(os.path.join(self.root, f"{key}.lock")):
+            yield
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_manifest(self, manifest):
+        tmp = partial_path(self.manifest_path)
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self.manifest_path)
+
+    @contextmanager
+    def _manifest(self):
+        with file_lock(self.manifest_path + ".lock"):
+            manifest = self._read_manifest()
+            yield manifest
+            self._write_manifest(manifest)
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        count("media_cache.hits" if hit else "media_cache.misses")
+
+    def get(self, key, ext):
+        """Returns the cached file for key, or None on a miss"""
+        path = self.path(key, ext)
+        if not os.path.exists(path):
+            self._count(False)
+            return None
+
+        self._count(True)
+        entry = self._read_manifest().get(key + ext)
+        now = time.time()
+        if entry is None or now - entry.get("last_access", 0) > ACCESS_WRITE_INTERVAL:
+            with self._manifest() as manifest:
+                entry = manifest.setdefault(key + ext, {"size": os.path.getsize(path), "render_time": 0.0})
+                entry["last_access"] = now
+        return path
+
+    def get_or_create(self, key, ext, produce):
+        """Returns the cached file for key, calling produce(tmp_path) to build it on a miss.
+
+        produce writes the file at the path it is given; it is renamed into place only
+        once complete, so readers never see a partial file.
+        """
+        path = self.get(key, ext)
+        if path:
+            return path
+
+        path = self.path(key, ext)
+        with self.lock(key + ext):
+            # Another process may have produced it while we were waiting on the lock
+            if os.path.exists(path):
+                return path
+
+            tmp = partial_path(path)
+            start = time.time()
+            try:
+                produce(tmp)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            render_time = time.time() - start
+
+        with self._manifest() as manifest:
+            now = time.time()
+            manifest[key + ext] = {
+                "size": os.path.getsize(path),
+                "last_access": now,
+                "created": now,
+                "render_time": round(render_time, 3),
+            }
+            self._evict(manifest, keep=key + ext)
+        return path
+
+    def _evict(self, manifest, keep=None):
+        total = sum(entry["size"] for entry in manifest.values())
+        for name in sorted(manifest, key=lambda n: manifest[n]["last_access"]):
+            if total <= self.quota_bytes:
+                break
+            if name == keep or os.path.exists(os.path.join(self.root, f"{name}.lock")):
+                continue
+            try:
+                os.remove(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass
+            total -= manifest.pop(name)["size"]
+
+    def evict(self):
+        """Evicts least recently used entries until the cache fits its quota"""
+        with self._manifest() as manifest:
+            self._evict(manifest)
+
+    def stats(self):
+        manifest = self._read_manifest()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(manifest),
+            "bytes": sum(entry["size"] for entry in manifest.values()),
+            "quota_bytes": self.quota_bytes,
+        }
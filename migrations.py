@@ -0,0 +1,182 @@
+"""Ordered schema migrations for quiz_app.db.
+
+Each migration is applied once, in order, and recorded in ``schema_version``. To
+change the schema, append a new entry with the next version number; never edit one
+that has already shipped. Migration 1 uses ``IF NOT EXISTS`` so databases created
+before versioning are adopted as they are.
+"""
+import time
+
+
+MIGRATIONS = [
+    (1, "Base tables", [
+        """CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT DEFAULT 'student',
+            email TEXT
+        )""",
+        """CREATE TABLE IF NOT EXISTS quiz_attempts (
+            username TEXT PRIMARY KEY,
+            attempt_count INTEGER DEFAULT 0,
+            FOREIGN KEY(username) REFERENCES users(username)
+        )""",
+        """CREATE TABLE IF NOT EXISTS password_changes (
+            username TEXT PRIMARY KEY,
+            change_count INTEGER DEFAULT 0,
+            FOREIGN KEY(username) REFERENCES users(username)
+        )""",
+        """CREATE TABLE IF NOT EXISTS recordings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            usn TEXT,
+            section TEXT,
+            attempt INTEGER,
+            start_time REAL NOT NULL,
+            end_time REAL NOT NULL,
+            frame_count INTEGER DEFAULT 0,
+            bytes INTEGER DEFAULT 0,
+            path TEXT UNIQUE NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_recordings_user ON recordings(username, attempt, start_time)",
+        "CREATE INDEX IF NOT EXISTS idx_recordings_section ON recordings(section, start_time)",
+        "CREATE INDEX IF NOT EXISTS idx_recordings_start ON recordings(start_time)",
+        """CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            hashed_password TEXT,
+            usn TEXT,
+            section TEXT,
+            score INTEGER NOT NULL,
+            time_taken REAL,
+            timestamp TEXT NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_results_username ON results(username)",
+        "CREATE INDEX IF NOT EXISTS idx_results_score ON results(score)",
+        "CREATE INDEX IF NOT EXISTS idx_results_time_taken ON results(time_taken)",
+        "CREATE INDEX IF NOT EXISTS idx_results_timestamp ON results(timestamp)",
+        """CREATE TABLE IF NOT EXISTS result_aggregates (
+            scope TEXT PRIMARY KEY,
+            count INTEGER DEFAULT 0,
+            score_sum REAL DEFAULT 0,
+            score_sq_sum REAL DEFAULT 0,
+            pass_count INTEGER DEFAULT 0,
+            histogram TEXT DEFAULT '{}',
+            time_sketch TEXT DEFAULT '{}'
+        )""",
+        """CREATE TABLE IF NOT EXISTS presence (
+            username TEXT PRIMARY KEY,
+            started_at REAL NOT NULL,
+            last_heartbeat REAL NOT NULL,
+            status TEXT DEFAULT 'started',
+            answered INTEGER DEFAULT 0,
+            total INTEGER DEFAULT 0
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_presence_heartbeat ON presence(last_heartbeat)",
+        """CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT,
+            kind TEXT NOT NULL,
+            detail TEXT,
+            created REAL NOT NULL
+        )""",
+    ]),
+    (2, "Indexes for password reset and results by section", [
+        # Forgot-password lookup: SELECT username FROM users WHERE email = ?
+        "CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)",
+        # Section filter ordered by time in the Professor Panel and exports
+        "CREATE INDEX IF NOT EXISTS idx_results_section ON results(section, timestamp)",
+    ]),
+    (3, "Email outbox", [
+        """CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recipient TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            next_attempt REAL NOT NULL,
+            claimed_at REAL,
+            last_error TEXT,
+            created REAL NOT NULL,
+            sent_at REAL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt)",
+    ]),
+    (4, "Question bank and per-student papers", [
+        """CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT UNIQUE NOT NULL,
+            options TEXT NOT NULL,
+            answer INTEGER NOT NULL,
+            topic TEXT NOT NULL DEFAULT 'general',
+            difficulty INTEGER NOT NULL DEFAULT 2,
+            active INTEGER NOT NULL DEFAULT 1,
+            updated REAL NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_questions_pool ON questions(active, topic, difficulty)",
+        """CREATE TABLE IF NOT EXISTS papers (
+            username TEXT NOT NULL,
+            attempt INTEGER NOT NULL,
+            question_ids TEXT NOT NULL,
+            created REAL NOT NULL,
+            PRIMARY KEY (username, attempt)
+        )""",
+    ]),
+    (5, "Per-answer responses", [
+        # Packed arrays: question ids as int32, chosen option indices as int8 (-1 unanswered)
+        """CREATE TABLE IF NOT EXISTS responses (
+            result_id INTEGER PRIMARY KEY,
+            question_ids BLOB NOT NULL,
+            choices BLOB NOT NULL,
+            FOREIGN KEY(result_id) REFERENCES results(id)
+        )""",
+    ]),
+    (6, "Blank the bodies of sent and failed emails", [
+        # Bodies hold OTPs and temporary passwords; outbox.py now blanks them as rows finish
+        "UPDATE outbox SET body = '' WHERE status IN ('sent', 'failed')",
+    ]),
+    (7, "Paper length on each result", [
+        # Papers can change length between sittings, so each result keeps the maximum it was marked out of
+        "ALTER TABLE results ADD COLUMN max_score INTEGER",
+        # Results with stored responses know their paper: question_ids holds one int32 per question
+        """UPDATE results SET max_score = (SELECT length(question_ids) / 4 FROM responses
+                                            WHERE responses.result_id = results.id)""",
+        "ALTER TABLE result_aggregates ADD COLUMN max_score_sum REAL DEFAULT 0",
+        "ALTER TABLE result_aggregates ADD COLUMN max_score_top INTEGER DEFAULT 0",
+        """UPDATE result_aggregates SET
+               max_score_sum = (SELECT COALESCE(SUM(max_score), 0) FROM results
+                                WHERE result_aggregates.scope IN ('*', COALESCE(results.section, ''))),
+               max_score_top = (SELECT COALESCE(MAX(max_score), 0) FROM results
+                                WHERE result_aggregates.scope IN ('*', COALESCE(results.section, '')))""",
+    ]),
+]
+
+
+def current_version(conn):
+    conn.execute("""CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at REAL NOT NULL
+    )""")
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Applies pending migrations; call inside a transaction. Returns the versions applied."""
+    version = current_version(conn)
+    applied = []
+    for number, description, statements in MIGRATIONS:
+        if number <= version:
+            continue
+        for statement in statements:
+            conn.execute(statement)
+        conn.execute("INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                     (number, description, time.time()))
+        applied.append(number)
+    return applied
+
+
+def latest_version():
+    return MIGRATIONS[-1][0]
@@ -0,0 +1,211 @@
+"""Durable email outbox drained by a background sender.
+
+Pages call ``enqueue`` and return at once; the message is a row in the ``outbox``
+table. A worker thread claims pending rows in batches, sends them over one
+authenticated SMTP connection that it keeps open between batches, and retries
+failures with exponential backoff. Rows survive restarts, and a row claimed by a
+worker that died is picked up again after ``CLAIM_TIMEOUT``. Bodies carry OTPs and
+temporary passwords, so they are blanked once a message is sent or given up on.
+
+SMTP settings come from the environment. To try it against a local debugging server:
+
+    python -m aiosmtpd -n -l localhost:1025     # or: python -m smtpd -n -c DebuggingServer localhost:1025
+    SMTP_SERVER=localhost SMTP_PORT=1025 SMTP_STARTTLS=0 python outbox.py --drain
+"""
+import os
+import time
+import smtplib
+import argparse
+import threading
+from email.message import EmailMessage
+
+from db import connection, transaction
+from tracing import span, count
+
+EMAIL_SENDER = os.environ.get("EMAIL_SENDER", "")
+EMAIL_PASSWORD = os.environ.get("EMAIL_PASSWORD", "")  # App Password
+SMTP_SERVER = os.environ.get("SMTP_SERVER", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "1") != "0"
+SMTP_TIMEOUT = 20
+
+BATCH_SIZE = 20
+MAX_ATTEMPTS = 6
+RETRY_BASE = 5  # Seconds before the first retry; doubles with each attempt
+CLAIM_TIMEOUT = 300  # A 'sending' row older than this is assumed abandoned
+IDLE_CLOSE = 60  # Close the SMTP connection after this long without mail
+POLL_SECONDS = 5  # Worker also checks the table this often, for mail queued by other processes
+
+_wake = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def enqueue(recipient, subject, body, conn=None):
+    """Queues a message for the background sender; pass conn to queue inside a caller's transaction"""
+    if conn is None:
+        with transaction() as conn:
+            return enqueue(recipient, subject, body, conn)
+    now = time.time()
+    message_id = conn.execute(
+        """INSERT INTO outbox (recipient, subject, body, status, attempts, next_attempt, created)
+           VALUES (?, ?, ?, 'pending', 0, ?, ?)""",
+        (recipient, subject, body, now, now)
+    ).lastrowid
+    _wake.set()
+    return message_id
+
+
+def _claim(limit):
+    now = time.time()
+    with transaction() as conn:
+        rows = conn.execute(
+            """SELECT id, recipient, subject, body, attempts FROM outbox
+               WHERE (status = 'pending' AND next_attempt <= ?)
+                  OR (status = 'sending' AND claimed_at < ?)
+               ORDER BY next_attempt LIMIT ?""",
+            (now, now - CLAIM_TIMEOUT, limit)
+        ).fetchall()
+        conn.executemany("UPDATE outbox SET status = 'sending', claimed_at = ? WHERE id = ?",
+                         [(now, row[0]) for row in rows])
+    return rows
+
+
+def _mark_sent(message_id):
+    with transaction() as conn:
+        conn.execute("UPDATE outbox SET status = 'sent', sent_at = ?, last_error = NULL, body = '' WHERE id = ?",
+                     (time.time(), message_id))
+
+
+def _mark_failed(message_id, attempts, error):
+    attempts += 1
+    status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+    with transaction() as conn:
+        conn.execute(
+            """UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?, last_error = ?,
+                   body = CASE WHEN ? = 'failed' THEN '' ELSE body END
+               WHERE id = ?""",
+            (status, attempts, time.time() + RETRY_BASE * 2 ** (attempts - 1), str(error)[:500], status, message_id)
+        )
+
+
+def build_message(recipient, subject, body):
+    msg = EmailMessage()
+    msg.set_content(body)
+    msg['Subject'] = subject
+    msg['From'] = EMAIL_SENDER
+    msg['To'] = recipient
+    return msg
+
+
+class SMTPSender:
+    """Holds one SMTP connection open across batches and reconnects when it drops"""
+
+    def __init__(self):
+        self.server = None
+        self.last_used = 0.0
+
+    def _connect(self):
+        with span("email.connect"):
+            server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT)
+            if SMTP_STARTTLS:
+                server.starttls()
+            if EMAIL_PASSWORD:
+                server.login(EMAIL_SENDER, EMAIL_PASSWORD)
+        return server
+
+    def send(self, msg):
+        if self.server is None:
+            self.server = self._connect()
+        with span("email.send"):
+            try:
+                self.server.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped an idle connection; reconnect once and retry
+                self.server = self._connect()
+                self.server.send_message(msg)
+        self.last_used = time.time()
+
+    def close_if_idle(self, idle=IDLE_CLOSE):
+        if self.server is not None and time.time() - self.last_used >= idle:
+            self.close()
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+
+
+def drain(sender, limit=BATCH_SIZE):
+    """Sends one batch of due messages; returns how many were claimed"""
+    rows = _claim(limit)
+    for message_id, recipient, subject, body, attempts in rows:
+        try:
+            sender.send(build_message(recipient, subject, body))
+        except Exception as e:
+            if isinstance(e, (smtplib.SMTPServerDisconnected, OSError)):
+                sender.close()
+            _mark_failed(message_id, attempts, e)
+            count("email.failed")
+        else:
+            _mark_sent(message_id)
+            count("email.sent")
+    return len(rows)
+
+
+def _run():
+    sender = SMTPSender()
+    while True:
+        _wake.clear()
+        try:
+            while drain(sender):
+                pass
+        except Exception:
+            pass  # Database busy or similar; rows stay queued and are retried next round
+        sender.close_if_idle()
+        _wake.wait(POLL_SECONDS)
+
+
+def start_worker():
+    """Starts the background sender once per process"""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="outbox", daemon=True)
+            _worker.start()
+    return _worker
+
+
+def outbox_stats():
+    with connection() as conn:
+        return dict(conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or drain the email outbox")
+    parser.add_argument("--drain", action="store_true", help="Send everything that is due, then exit")
+    args = parser.parse_args()
+
+    from db import init_db
+    init_db()
+
+    if args.drain:
+        sender = SMTPSender()
+        try:
+            sent = 0
+            while True:
+                claimed = drain(sender)
+                if not claimed:
+                    break
+                sent += claimed
+        finally:
+            sender.close()
+        print(f"Processed {sent} messages")
+    print(outbox_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Live quiz-taker presence, kept in the ``presence`` table.
+
+The quiz page upserts a heartbeat for the student on each rerun, and the proctoring
+camera keeps it fresh while the student reads without clicking. Anyone whose last
+heartbeat is older than ``PRESENCE_TTL`` no longer counts as active, so dropped
+sessions age out on their own, and the Monitoring Panel prunes their rows. Each row also carries the student's progress
+(started, photo taken, answered N/total, submitted), and every status change is
+published to the change feed.
+"""
+import time
+
+from db import connection, transaction
+from changefeed import publish
+
+PRESENCE_TTL = 300  # Seconds without a heartbeat before a student stops counting as live
+HEARTBEAT_INTERVAL = 15  # Minimum seconds between heartbeat writes from one session
+
+
+def heartbeat(username):
+    """Marks the student as live, adding them if they weren't already"""
+    now = time.time()
+    with transaction() as conn:
+        updated = conn.execute("UPDATE presence SET last_heartbeat = ? WHERE username = ?",
+                               (now, username)).rowcount
+        if not updated:
+            joined = conn.execute(
+                """INSERT OR IGNORE INTO presence (username, started_at, last_heartbeat, status)
+                   VALUES (?, ?, ?, 'started')""",
+                (username, now, now)
+            ).rowcount
+            if joined:
+                publish(username, "started", conn=conn)
+
+
+def set_status(username, status, answered=None, total=None):
+    """Updates the student's progress and publishes it to the change feed"""
+    now = time.time()
+    with transaction() as conn:
+        conn.execute(
+            """INSERT INTO presence (username, started_at, last_heartbeat, status, answered, total)
+               VALUES (?, ?, ?, ?, COALESCE(?, 0), COALESCE(?, 0))
+               ON CONFLICT(username) DO UPDATE SET
+                   last_heartbeat = excluded.last_heartbeat,
+                   status = excluded.status,
+                   answered = COALESCE(?, answered),
+                   total = COALESCE(?, total)""",
+            (username, now, now, status, answered, total, answered, total)
+        )
+        detail = f"{answered}/{total}" if answered is not None and total else None
+        publish(username, status, detail, conn=conn)
+
+
+def live_students(ttl=PRESENCE_TTL):
+    """Students with a heartbeat within the last ttl seconds, in the order they started"""
+    with connection() as conn:
+        cursor = conn.execute(
+            """SELECT username, status, answered, total, started_at, last_heartbeat
+               FROM presence WHERE last_heartbeat >= ? ORDER BY started_at""",
+            (time.time() - ttl,)
+        )
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def prune(ttl=PRESENCE_TTL):
+    """Deletes presence rows that have aged out"""
+    with transaction() as conn:
+        conn.execute("DELETE FROM presence WHERE last_heartbeat < ?", (time.time() - ttl,))
@@ -0,0 +1,176 @@
+"""Thumbnails and low-res proxies for recordings and verification photos.
+
+Previews are built by a background worker pool and stored under ``PREVIEW_DIR``, so
+the View Recordings panel can show a fast gallery and only load originals on demand.
+Capture only queues a segment's thumbnail; the ffmpeg proxy is built when View
+Recordings first asks for it, so encodes never compete with a running exam. At most
+``PREVIEW_QUEUE_LIMIT`` jobs wait at once; requests beyond that are dropped and simply
+made again the next time the gallery is drawn.
+"""
+import os
+import hashlib
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from media_cache import partial_path
+
+PREVIEW_DIR = os.path.join(tempfile.gettempdir(), "previews")
+
+THUMB_SIZE = (160, 120)
+GRID = (2, 2)  # Columns x rows of frames in a recording's thumbnail sheet
+PROXY_WIDTH = 320
+PROXY_BITRATE = "150k"
+PREVIEW_WORKERS = 2
+PREVIEW_QUEUE_LIMIT = 200
+
+_executor = None
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _preview_path(source, suffix):
+    # Hash the full path so files with the same name in different folders don't collide
+    digest = hashlib.sha1(os.path.abspath(source).encode()).hexdigest()[:16]
+    return os.path.join(PREVIEW_DIR, f"{digest}{suffix}")
+
+
+def thumbnail_path(source):
+    return _preview_path(source, "_thumb.jpg")
+
+
+def proxy_path(source):
+    return _preview_path(source, "_proxy.mp4")
+
+
+def _write_jpeg(path, img, quality=70):
+    tmp = partial_path(path)
+    try:
+        cv2.imwrite(tmp, img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _fit(img, size):
+    if img.ndim == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+
+
+def make_recording_thumbnail(video_path):
+    """Builds a grid of frames sampled evenly across the recording"""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 1
+        cols, rows = GRID
+        width, height = THUMB_SIZE
+        sheet = np.zeros((height * rows, width * cols, 3), dtype=np.uint8)
+
+        for i in range(cols * rows):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, min(total - 1, i * total // (cols * rows)))
+            ok, frame = cap.read()
+            if not ok:
+                continue
+            row, col = divmod(i, cols)
+            sheet[row * height:(row + 1) * height, col * width:(col + 1) * width] = _fit(frame, THUMB_SIZE)
+    finally:
+        cap.release()
+
+    _write_jpeg(thumbnail_path(video_path), sheet)
+
+
+def make_recording_proxy(video_path):
+    """Re-encodes the recording as a small, low-bitrate H.264 clip for quick preview"""
+    import imageio_ffmpeg
+
+    target = proxy_path(video_path)
+    tmp = partial_path(target)
+    try:
+        subprocess.run(
+            [imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error", "-i", video_path,
+             "-vf", f"scale={PROXY_WIDTH}:-2", "-c:v", "libx264", "-preset", "veryfast",
+             "-b:v", PROXY_BITRATE, "-pix_fmt", "yuv420p", "-an", "-movflags", "+faststart", tmp],
+            check=True, capture_output=True,
+        )
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def make_photo_thumbnail(photo_path):
+    img = cv2.imread(photo_path)
+    if img is None:
+        raise ValueError(f"Could not read image {photo_path}")
+    height, width = img.shape[:2]
+    scale = THUMB_SIZE[0] / width
+    _write_jpeg(thumbnail_path(photo_path), cv2.resize(img, (THUMB_SIZE[0], max(1, int(height * scale))),
+                                                       interpolation=cv2.INTER_AREA))
+
+
+def _build_recording(video_path):
+    if not os.path.exists(thumbnail_path(video_path)):
+        make_recording_thumbnail(video_path)
+    if not os.path.exists(proxy_path(video_path)):
+        make_recording_proxy(video_path)
+
+
+def _submit(job, source):
+    global _executor
+    with _pending_lock:
+        if source in _pending or len(_pending) >= PREVIEW_QUEUE_LIMIT:
+            return
+        _pending.add(source)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PREVIEW_WORKERS, thread_name_prefix="previews")
+
+    def run():
+        try:
+            job(source)
+        except Exception:
+            pass  # Missing previews fall back to the original; the next request retries
+        finally:
+            with _pending_lock:
+                _pending.discard(source)
+
+    os.makedirs(PREVIEW_DIR, exist_ok=True)
+    _executor.submit(run)
+
+
+def request_recording_thumbnail(video_path):
+    """Queues just the thumbnail sheet for a recording; cheap enough for the capture path"""
+    if not os.path.exists(thumbnail_path(video_path)):
+        _submit(make_recording_thumbnail, video_path)
+
+
+def request_recording_previews(video_path):
+    """Queues thumbnail and proxy generation for a recording if they don't exist yet"""
+    if not (os.path.exists(thumbnail_path(video_path)) and os.path.exists(proxy_path(video_path))):
+        _submit(_build_recording, video_path)
+
+
+def request_photo_thumbnail(photo_path):
+    if not os.path.exists(thumbnail_path(photo_path)):
+        _submit(make_photo_thumbnail, photo_path)
+
+
+def ready_thumbnail(source):
+    path = thumbnail_path(source)
+    return path if os.path.exists(path) else None
+
+
+def ready_proxy(source):
+    path = proxy_path(source)
+    return path if os.path.exists(path) else None
+
+
+def remove_previews(source):
+    for path in (thumbnail_path(source), proxy_path(source)):
+        if os.path.exists(path):
+            os.remove(path)
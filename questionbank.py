@@ -0,0 +1,205 @@
+"""Question bank stored in the ``questions`` table, and the per-student papers drawn from it.
+
+Each question has a topic and a difficulty (1 easy .. 3 hard). A paper is a random
+selection of question ids, balanced across topic/difficulty groups, drawn once per
+student attempt and kept in the ``papers`` table so reloads show the same paper.
+The bank is loaded into memory once per process; its answer key is a byte array
+indexed by question id, so grading is one lookup per answer.
+
+    python questionbank.py --import bank.json    # list of {question, options, answer, topic, difficulty}
+    python questionbank.py --stats
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from array import array
+
+from db import connection, transaction
+
+PAPER_SIZE = 10  # Questions per paper, capped at the number of active questions
+BANK_REFRESH_SECONDS = 30  # How often a running process checks the table for edits
+
+_bank = None
+_bank_checked = 0.0
+_bank_lock = threading.Lock()
+
+
+class QuestionBank:
+    """In-memory snapshot of the questions table"""
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.questions = {}
+        self.pools = {}  # (topic, difficulty) -> ids of active questions
+        max_id = max((row[0] for row in rows), default=0)
+        # answer_key[id] is the correct option index, -1 for unused ids
+        self.answer_key = array('b', [-1]) * (max_id + 1)
+
+        for qid, text, options, answer, topic, difficulty, active in rows:
+            self.questions[qid] = {"id": qid, "question": text, "options": json.loads(options),
+                                   "topic": topic, "difficulty": difficulty}
+            # Retired questions stay gradable for papers that already include them
+            self.answer_key[qid] = answer
+            if active:
+                self.pools.setdefault((topic, difficulty), []).append(qid)
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.pools.values())
+
+    def get(self, qid):
+        return self.questions[qid]
+
+    def active_questions(self):
+        return [self.questions[qid] for ids in self.pools.values() for qid in ids]
+
+    def topics(self):
+        return sorted({topic for topic, _ in self.pools})
+
+    def draw(self, size=PAPER_SIZE, topics=None, rng=None):
+        """Picks up to size distinct question ids, taking from each topic/difficulty group in turn"""
+        rng = rng or random.Random()
+        groups = [ids for (topic, _), ids in sorted(self.pools.items()) if not topics or topic in topics]
+        # Sampling at most size ids per group keeps this cheap however large the pool is
+        picks = [rng.sample(ids, min(len(ids), size)) for ids in groups]
+        # Round-robin over the groups so every topic and difficulty is represented
+        paper = [group[i] for i in range(size) for group in picks if i < len(group)][:size]
+        rng.shuffle(paper)
+        return paper
+
+    def grade(self, question_ids, choices):
+        """Counts correct answers; choices holds the chosen option index (or None) per question"""
+        key = self.answer_key
+        return sum(1 for qid, choice in zip(question_ids, choices) if choice is not None and key[qid] == choice)
+
+
+def _bank_version(conn):
+    return conn.execute("SELECT COUNT(*), COALESCE(MAX(updated), 0) FROM questions").fetchone()
+
+
+def load_bank():
+    with connection() as conn:
+        version = _bank_version(conn)
+        rows = conn.execute(
+            "SELECT id, text, options, answer, topic, difficulty, active FROM questions ORDER BY id"
+        ).fetchall()
+    return QuestionBank(rows, version)
+
+
+def get_bank():
+    """Returns the process-wide bank, reloading it if the table changed since the last check"""
+    global _bank, _bank_checked
+    now = time.time()
+    if _bank is not None and now - _bank_checked < BANK_REFRESH_SECONDS:
+        return _bank
+    with _bank_lock:
+        if _bank is None:
+            _bank = load_bank()
+        elif now - _bank_checked >= BANK_REFRESH_SECONDS:
+            with connection() as conn:
+                changed = _bank_version(conn) != _bank.version
+            if changed:
+                _bank = load_bank()
+        _bank_checked = now
+    return _bank
+
+
+def paper_size():
+    return min(PAPER_SIZE, len(get_bank()))
+
+
+def add_questions(questions):
+    """Inserts questions given as {question, options, answer, topic, difficulty} dicts.
+
+    answer may be the correct option's text or its index. Existing questions (same text)
+    are skipped. Returns the number added.
+    """
+    rows = []
+    for q in questions:
+        answer = q["answer"]
+        if not isinstance(answer, int):
+            answer = q["options"].index(answer)
+        rows.append((q["question"], json.dumps(q["options"]), answer,
+                     q.get("topic") or "general", int(q.get("difficulty") or 2), time.time()))
+    with transaction() as conn:
+        before = conn.total_changes
+        conn.executemany(
+            """INSERT OR IGNORE INTO questions (text, options, answer, topic, difficulty, active, updated)
+               VALUES (?, ?, ?, ?, ?, 1, ?)""",
+            rows
+        )
+        added = conn.total_changes - before
+    _invalidate()
+    return added
+
+
+def set_active(qid, active):
+    with transaction() as conn:
+        conn.execute("UPDATE questions SET active = ?, updated = ? WHERE id = ?", (1 if active else 0, time.time(), qid))
+    _invalidate()
+
+
+def set_answer(qid, option):
+    """Corrects a question's answer key; stored responses can then be regraded (see itemanalysis.py)"""
+    with transaction() as conn:
+        conn.execute("UPDATE questions SET answer = ?, updated = ? WHERE id = ?", (option, time.time(), qid))
+    _invalidate()
+
+
+def _invalidate():
+    global _bank_checked
+    _bank_checked = 0.0
+
+
+def seed_bank():
+    """Loads the built-in questions into an empty bank"""
+    with connection() as conn:
+        empty = conn.execute("SELECT NOT EXISTS (SELECT 1 FROM questions)").fetchone()[0]
+    if empty:
+        from questions import QUESTIONS
+        add_questions(QUESTIONS)
+
+
+def get_or_create_paper(username, attempt, size=None, topics=None):
+    """Returns the question ids of this attempt's paper, drawing and storing it the first time"""
+    with connection() as conn:
+        row = conn.execute("SELECT question_ids FROM papers WHERE username = ? AND attempt = ?",
+                           (username, attempt)).fetchone()
+    if row:
+        return json.loads(row[0])
+
+    paper = get_bank().draw(size or PAPER_SIZE, topics)
+    with transaction() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO papers (username, attempt, question_ids, created) VALUES (?, ?, ?, ?)",
+            (username, attempt, json.dumps(paper), time.time())
+        )
+        # Another session may have drawn this attempt's paper first; keep whichever was stored
+        row = conn.execute("SELECT question_ids FROM papers WHERE username = ? AND attempt = ?",
+                           (username, attempt)).fetchone()
+    return json.loads(row[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the question bank")
+    parser.add_argument("--import", dest="import_path", metavar="JSON", help="Add questions from a JSON list")
+    parser.add_argument("--stats", action="store_true", help="Show question counts per topic and difficulty")
+    args = parser.parse_args()
+
+    from db import init_db
+    init_db()
+    seed_bank()
+
+    if args.import_path:
+        with open(args.import_path, encoding="utf-8") as f:
+            print(f"Added {add_questions(json.load(f))} questions from {args.import_path}")
+    if args.stats or not args.import_path:
+        bank = load_bank()
+        for (topic, difficulty), ids in sorted(bank.pools.items()):
+            print(f"{topic:20s} difficulty {difficulty}: {len(ids)}")
+        print(f"{len(bank)} active questions")
+
+
+if __name__ == "__main__":
+    main()
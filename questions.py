@@ -0,0 +1,6 @@
+# Quiz questions; loaded into the question bank on first start (see questionbank.py)
+QUESTIONS = [
+    {"question": "🔤 Which data type is used to store a single character in C? 🎯", "options": ["char", "int", "float", "double"], "answer": "char", "topic": "C basics", "difficulty": 1},
+    {"question": "🔢 What is the output of 5 / 2 in C if both operands are integers? ⚡", "options": ["2.5", "2", "3", "Error"], "answer": "2", "topic": "C basics", "difficulty": 2},
+    {"question": "🔁 Which loop is used when the number of iterations is known? 🔄", "options": ["while", "do-while", "for", "if"], "answer": "for", "topic": "C basics", "difficulty": 1},
+    {"question": "📌 What is the format specifier for printing an integer in C? 🖨️", "options": ["%c", "%d", "%f", "%s"], "answer": "%d", "topic": "C basics", "difficulty": 1}]
@@ -0,0 +1,282 @@
+"""Background recorder for proctoring webcam frames.
+
+Frames are handed to a writer thread through a bounded queue and appended to an
+open encoder as they arrive, so the WebRTC receive thread never blocks on disk or
+encoding. When the writer falls behind, new frames are dropped instead of
+buffering without limit.
+
+What gets recorded is set by a capture profile (``CAPTURE_PROFILE`` environment
+variable): frames are decimated by timestamp to the profile's frame rate and
+downscaled/greyscaled before they are queued, and the writer runs at that same rate.
+
+In ``keyframe`` recording mode (``RECORDING_MODE`` environment variable) only frames
+that differ from the last stored one are kept, plus a periodic heartbeat frame. Those
+segments are written with PyAV using each frame's real timestamp as its pts, so
+playback timing stays correct even though static stretches are skipped.
+"""
+import os
+import time
+import queue
+import weakref
+import threading
+from fractions import Fraction
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from tracing import span, count, register_gauge
+
+_STOP = object()
+_live = weakref.WeakSet()  # Open recorders, for the process-wide queue depth gauge
+
+CAPTURE_PROFILES = {
+    "low": {"fps": 2, "size": (320, 240), "grayscale": True},
+    "standard": {"fps": 5, "size": (640, 480), "grayscale": False},
+    "high": {"fps": 10, "size": None, "grayscale": False},
+}
+CAPTURE_PROFILE = os.environ.get("CAPTURE_PROFILE", "standard")
+
+RECORDING_MODES = ("continuous", "keyframe")
+RECORDING_MODE = os.environ.get("RECORDING_MODE", "continuous")
+
+CHANGE_PROBE_SIZE = (64, 48)  # Frames are compared on a tiny greyscale copy
+CHANGE_PIXEL_DELTA = 25  # Per-pixel intensity difference that counts as changed
+CHANGE_FRACTION = 0.02  # Share of changed pixels that makes a frame worth storing
+HEARTBEAT_SECONDS = 5.0  # Store a frame at least this often even if nothing changed
+
+
+def get_profile(name=None):
+    name = name or CAPTURE_PROFILE
+    if name not in CAPTURE_PROFILES:
+        raise ValueError(f"Unknown capture profile '{name}', expected one of {sorted(CAPTURE_PROFILES)}")
+    return CAPTURE_PROFILES[name]
+
+
+class FrameSampler:
+    """Keeps frames at a target rate based on their arrival time, not how many were stored"""
+
+    def __init__(self, fps):
+        self.interval = 1.0 / fps
+        self.next_due = 0.0
+        self.received = 0
+        self.kept = 0
+
+    def should_keep(self, timestamp):
+        self.received += 1
+        if timestamp < self.next_due:
+            return False
+        # Step along a fixed grid so jitter doesn't slow the rate; resync after long gaps
+        self.next_due += self.interval
+        if self.next_due <= timestamp:
+            self.next_due = timestamp + self.interval
+        self.kept += 1
+        return True
+
+
+class ChangeDetector:
+    """Decides whether a frame differs enough from the last stored frame to keep it"""
+
+    def __init__(self, pixel_delta=CHANGE_PIXEL_DELTA, fraction=CHANGE_FRACTION, heartbeat=HEARTBEAT_SECONDS):
+        self.pixel_delta = pixel_delta
+        self.fraction = fraction
+        self.heartbeat = heartbeat
+        self.last_probe = None
+        self.last_kept = 0.0
+        self.skipped = 0
+
+    def should_keep(self, img, timestamp):
+        gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        probe = cv2.resize(gray, CHANGE_PROBE_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+        keep = self.last_probe is None or timestamp - self.last_kept >= self.heartbeat
+        if not keep:
+            changed = np.count_nonzero(np.abs(probe - self.last_probe) > self.pixel_delta)
+            keep = changed >= self.fraction * probe.size
+
+        if keep:
+            self.last_probe = probe
+            self.last_kept = timestamp
+        else:
+            self.skipped += 1
+        return keep
+
+
+class _CvWriter:
+    """Constant frame rate mp4v writer"""
+
+    def __init__(self, path, fps, img, start):
+        height, width = img.shape[:2]
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        self.writer = cv2.VideoWriter(path, fourcc, fps, (width, height), img.ndim == 3)
+
+    def write(self, img, timestamp):
+        self.writer.write(img)
+
+    def release(self):
+        self.writer.release()
+
+
+class _TimestampedWriter:
+    """Variable frame rate H.264 writer that stamps each frame with its capture time"""
+
+    def __init__(self, path, fps, img, start):
+        import av
+
+        height, width = img.shape[:2]
+        self.av = av
+        self.start = start
+        self.last_pts = -1
+        self.format = "gray" if img.ndim == 2 else "bgr24"
+        self.container = av.open(path, mode="w")
+        self.stream = self.container.add_stream("libx264", rate=fps)
+        self.stream.width = width
+        self.stream.height = height
+        self.stream.pix_fmt = "yuv420p"
+        self.stream.codec_context.time_base = Fraction(1, 1000)
+
+    def write(self, img, timestamp):
+        frame = self.av.VideoFrame.from_ndarray(img, format=self.format)
+        # Millisecond pts from the capture time; must be strictly increasing
+        pts = max(int((timestamp - self.start) * 1000), self.last_pts + 1)
+        frame.pts = pts
+        frame.time_base = self.stream.codec_context.time_base
+        self.last_pts = pts
+        for packet in self.stream.encode(frame):
+            self.container.mux(packet)
+
+    def release(self):
+        for packet in self.stream.encode():
+            self.container.mux(packet)
+        self.container.close()
+
+
+def prepare_frame(img, profile):
+    """Downscales and optionally greyscales a bgr24 frame according to the profile"""
+    size = profile["size"]
+    if size and (img.shape[1], img.shape[0]) != tuple(size):
+        img = cv2.resize(img, tuple(size), interpolation=cv2.INTER_AREA)
+    if profile["grayscale"] and img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return img
+
+
+class StreamingRecorder:
+    def __init__(self, output_dir, profile=None, mode=None, max_queue=64, segment_seconds=20, prefix="quiz_recording",
+                 on_segment=None):
+        self.output_dir = output_dir
+        self.profile = get_profile(profile)
+        self.mode = mode or RECORDING_MODE
+        if self.mode not in RECORDING_MODES:
+            raise ValueError(f"Unknown recording mode '{self.mode}', expected one of {RECORDING_MODES}")
+        self.detector = ChangeDetector() if self.mode == "keyframe" else None
+        # The writer runs at the real capture rate so playback speed is correct
+        self.fps = self.profile["fps"]
+        self.sampler = FrameSampler(self.fps)
+        self.segment_seconds = segment_seconds
+        self.prefix = prefix
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped_frames = 0
+        self.written_frames = 0
+        self.segments = []
+        self.last_error = None
+        # Called on the writer thread as on_segment(path, start_time, end_time, frame_count)
+        self.on_segment = on_segment
+
+        self._writer = None
+        self._segment_path = None
+        self._segment_start = None
+        self._segment_end = None
+        self._segment_frames = 0
+        self._thread = threading.Thread(target=self._run, name="recorder-writer", daemon=True)
+        self._thread.start()
+        _live.add(self)
+
+    @property
+    def queue_depth(self):
+        return self.queue.qsize()
+
+    def submit(self, img, timestamp=None):
+        """Samples, shrinks and queues a frame; returns False if it was not queued"""
+        timestamp = timestamp or time.time()
+        if not self.sampler.should_keep(timestamp):
+            return False
+
+        img = prepare_frame(img, self.profile)
+        if self.detector and not self.detector.should_keep(img, timestamp):
+            return False
+
+        try:
+            self.queue.put_nowait((timestamp, img))
+            return True
+        except queue.Full:
+            self.dropped_frames += 1
+            count("recorder.frames_dropped")
+            return False
+
+    def stats(self):
+        return {
+            "received_frames": self.sampler.received,
+            "sampled_frames": self.sampler.kept,
+            "static_frames_skipped": self.detector.skipped if self.detector else 0,
+            "queue_depth": self.queue_depth,
+            "dropped_frames": self.dropped_frames,
+            "written_frames": self.written_frames,
+            "segments": len(self.segments),
+        }
+
+    def close(self, timeout=10):
+        """Flushes queued frames, finalizes the current segment and stops the writer"""
+        if not self._thread.is_alive():
+            return
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _open_segment(self, img, timestamp):
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = datetime.fromtimestamp(timestamp).strftime("%Y%m%d_%H%M%S")
+        self._segment_path = os.path.join(self.output_dir, f"{self.prefix}_{name}.mp4")
+        writer_class = _TimestampedWriter if self.mode == "keyframe" else _CvWriter
+        self._writer = writer_class(self._segment_path, self.fps, img, timestamp)
+        self._segment_start = timestamp
+        self._segment_end = timestamp
+        self._segment_frames = 0
+
+    def _close_segment(self):
+        if self._writer is None:
+            return
+        with span("recorder.finalize"):
+            self._writer.release()
+        self._writer = None
+        self.segments.append(self._segment_path)
+        if self.on_segment:
+            self.on_segment(self._segment_path, self._segment_start, self._segment_end, self._segment_frames)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                break
+            timestamp, img = item
+            try:
+                if self._writer is not None and timestamp - self._segment_start >= self.segment_seconds:
+                    self._close_segment()
+                with span("recorder.write"):
+                    if self._writer is None:
+                        self._open_segment(img, timestamp)
+                    self._writer.write(img, timestamp)
+                self._segment_end = timestamp
+                self._segment_frames += 1
+                self.written_frames += 1
+            except Exception as e:
+                self.last_error = e
+        try:
+            self._close_segment()
+        except Exception as e:
+            self.last_error = e
+
+
+register_gauge("recorder.queue_depth", lambda: sum(r.queue_depth for r in list(_live)))
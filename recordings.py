@@ -0,0 +1,65 @@
+"""Index of proctoring recording segments, stored in the ``recordings`` table."""
+import os
+import re
+
+from db import connection, transaction
+
+
+def segment_prefix(username, usn, section, attempt):
+    """Filename prefix that tags a segment with who recorded it and in which attempt"""
+    parts = [username, usn or "NOUSN", section or "NOSECTION", f"a{attempt}"]
+    return "_".join(re.sub(r"[^A-Za-z0-9-]", "", str(part)) or "x" for part in parts)
+
+
+def register_segment(username, usn, section, attempt, path, start_time, end_time, frame_count):
+    with transaction() as conn:
+        conn.execute(
+            """INSERT OR REPLACE INTO recordings
+               (username, usn, section, attempt, start_time, end_time, frame_count, bytes, path)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (username, usn, section, attempt, start_time, end_time, frame_count,
+             os.path.getsize(path) if os.path.exists(path) else 0, path)
+        )
+
+
+def _filters(username=None, section=None, attempt=None):
+    clauses, params = [], []
+    if username:
+        clauses.append("username = ?")
+        params.append(username)
+    if section:
+        clauses.append("section = ?")
+        params.append(section)
+    if attempt:
+        clauses.append("attempt = ?")
+        params.append(attempt)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def count_recordings(username=None, section=None, attempt=None):
+    where, params = _filters(username, section, attempt)
+    with connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM recordings {where}", params).fetchone()[0]
+
+
+def query_recordings(username=None, section=None, attempt=None, limit=20, offset=0):
+    """Returns one page of segments as dicts, newest first"""
+    where, params = _filters(username, section, attempt)
+    with connection() as conn:
+        cursor = conn.execute(
+            f"""SELECT id, username, usn, section, attempt, start_time, end_time, frame_count, bytes, path
+                FROM recordings {where}
+                ORDER BY start_time DESC LIMIT ? OFFSET ?""",
+            params + [limit, offset]
+        )
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def delete_recording(recording_id):
+    with transaction() as conn:
+        row = conn.execute("SELECT path FROM recordings WHERE id = ?", (recording_id,)).fetchone()
+        if row and os.path.exists(row[0]):
+            os.remove(row[0])
+        conn.execute("DELETE FROM recordings WHERE id = ?", (recording_id,))
@@ -0,0 +1,176 @@
+"""Quiz results store backed by the indexed ``results`` table.
+
+Submissions are single-row inserts, committed in the same transaction as the
+attempt counter, so they cost the same no matter how many results exist. Exports are
+produced on demand by export.py; legacy CSV files can be loaded with:
+
+    python results.py --import professor_results.csv
+    python results.py --rebuild-aggregates
+"""
+import argparse
+from array import array
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from db import connection, transaction
+from aggregates import update_aggregates, get_aggregates, rebuild_aggregates
+
+COLUMNS = ["Username", "Hashed_Password", "USN", "Section", "Score", "Time_Taken", "Timestamp"]
+
+_SELECT = """SELECT username AS Username, hashed_password AS Hashed_Password, usn AS USN,
+                    section AS Section, score AS Score, time_taken AS Time_Taken, timestamp AS Timestamp
+             FROM results"""
+
+
+def pack_responses(question_ids, choices):
+    """Packs a paper's question ids (int32) and chosen option indices (int8, -1 unanswered)"""
+    return (array('i', question_ids).tobytes(),
+            array('b', [-1 if c is None else c for c in choices]).tobytes())
+
+
+def record_submission(username, hashed_password, usn, section, score, time_taken, max_score, timestamp=None,
+                      question_ids=None, choices=None, max_attempts=None):
+    """Stores a result and its answers, increments the user's attempt count and updates aggregates in one transaction.
+
+    Returns the result id, or None without storing anything if the user has already used max_attempts.
+    """
+    timestamp = timestamp or datetime.now().isoformat(sep=" ")
+    with transaction() as conn:
+        if max_attempts is not None:
+            # Checked under the write lock, so two sessions can't both take the last attempt
+            row = conn.execute("SELECT attempt_count FROM quiz_attempts WHERE username = ?", (username,)).fetchone()
+            if row and row[0] >= max_attempts:
+                return None
+        cursor = conn.execute(
+            """INSERT INTO results (username, hashed_password, usn, section, score, time_taken, max_score, timestamp)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            (username, hashed_password, usn, section, score, time_taken, max_score, timestamp)
+        )
+        if question_ids is not None:
+            conn.execute("INSERT INTO responses (result_id, question_ids, choices) VALUES (?, ?, ?)",
+                         (cursor.lastrowid,) + pack_responses(question_ids, choices))
+        conn.execute(
+            """INSERT INTO quiz_attempts (username, attempt_count) VALUES (?, 1)
+               ON CONFLICT(username) DO UPDATE SET attempt_count = attempt_count + 1""",
+            (username,)
+        )
+        update_aggregates(conn, section, score, time_taken, max_score)
+    return cursor.lastrowid
+
+
+def list_sections():
+    with connection() as conn:
+        return [row[0] for row in conn.execute("SELECT DISTINCT section FROM results ORDER BY section")]
+
+
+def section_summary(section=None):
+    """Precomputed count/mean/pass rate/time percentiles for a section, or all sections"""
+    with connection() as conn:
+        return get_aggregates(conn, section)
+
+
+SORT_COLUMNS = {
+    "Score": "score",
+    "Time_Taken": "time_taken",
+    "Timestamp": "timestamp",
+    "Section": "section",
+}
+
+
+def _filters(section=None, min_score=None, max_score=None, date_from=None, date_to=None):
+    clauses, params = [], []
+    if section:
+        clauses.append("section = ?")
+        params.append(section)
+    if min_score is not None:
+        clauses.append("score >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        clauses.append("score <= ?")
+        params.append(max_score)
+    if date_from:
+        clauses.append("timestamp >= ?")
+        params.append(date_from.isoformat())
+    if date_to:
+        # Timestamps are ISO strings, so everything on date_to sorts before the next day
+        clauses.append("timestamp < ?")
+        params.append((date_to + timedelta(days=1)).isoformat())
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def count_results(section=None, min_score=None, max_score=None, date_from=None, date_to=None):
+    where, params = _filters(section, min_score, max_score, date_from, date_to)
+    with connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM results {where}", params).fetchone()[0]
+
+
+def query_results(section=None, min_score=None, max_score=None, date_from=None, date_to=None,
+                  sort_by="Score", ascending=True, limit=50, offset=0):
+    """Returns one sorted, filtered page of results; only that page is read from the database"""
+    where, params = _filters(section, min_score, max_score, date_from, date_to)
+    column = SORT_COLUMNS[sort_by]
+    direction = "ASC" if ascending else "DESC"
+    with connection() as conn:
+        return pd.read_sql_query(
+            f"{_SELECT} {where} ORDER BY {column} {direction}, id {direction} LIMIT ? OFFSET ?",
+            conn, params=params + [limit, offset]
+        )
+
+
+def iter_results(section=None, min_score=None, max_score=None, date_from=None, date_to=None,
+                 sort_by=None, ascending=True, chunksize=5000):
+    """Yields matching results as DataFrames of at most chunksize rows"""
+    where, params = _filters(section, min_score, max_score, date_from, date_to)
+    direction = "ASC" if ascending else "DESC"
+    order = f"{SORT_COLUMNS[sort_by]} {direction}, id {direction}" if sort_by else "id"
+    with connection() as conn:
+        for chunk in pd.read_sql_query(f"{_SELECT} {where} ORDER BY {order}", conn, params=params, chunksize=chunksize):
+            yield chunk
+
+
+def import_csv(path, max_score):
+    """Loads rows from a legacy results CSV, each marked out of max_score; returns the number of rows imported"""
+    df = pd.read_csv(path)
+    rows = [
+        (r.Username, r.Hashed_Password, r.USN, r.Section, int(r.Score), float(r.Time_Taken), max_score, str(r.Timestamp))
+        for r in df[COLUMNS].itertuples(index=False)
+    ]
+    with transaction() as conn:
+        conn.executemany(
+            """INSERT INTO results (username, hashed_password, usn, section, score, time_taken, max_score, timestamp)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            rows
+        )
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import legacy quiz results")
+    parser.add_argument("--import", dest="import_path", metavar="CSV", help="Load a legacy results CSV")
+    parser.add_argument("--max-score", type=int, metavar="N",
+                        help="What imported scores are out of (legacy CSVs don't say; default: the current paper size)")
+    parser.add_argument("--rebuild-aggregates", action="store_true", help="Recompute the Professor Panel aggregates")
+    args = parser.parse_args()
+
+    from db import init_db
+    init_db()
+
+    if args.import_path or args.rebuild_aggregates:
+        from questionbank import seed_bank, paper_size
+        seed_bank()
+    if args.import_path:
+        imported = import_csv(args.import_path, args.max_score or paper_size())
+        print(f"Imported {imported} rows from {args.import_path}")
+    if args.import_path or args.rebuild_aggregates:
+        with transaction() as conn:
+            # Only results stored without a max_score fall back to the current paper size
+            rebuild_aggregates(conn, paper_size())
+        print("Rebuilt result aggregates")
+    if not (args.import_path or args.rebuild_aggregates):
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Import-time report and cold-start budget check for the app.
+
+Each measurement runs in a fresh interpreter so nothing is already imported:
+
+    python startup_report.py                  # slowest imports behind the Login page
+    python startup_report.py --page take_quiz --top 40
+    python startup_report.py --check          # exit 1 if Login's cold start exceeds the budget
+
+--check drives the real script headlessly with Streamlit's AppTest: a first run
+(bootstrap plus the Register page), then switching the sidebar to Login. The same
+check runs as tests/test_startup.py. Both use a scratch database and temp directory,
+with the media prerender turned off.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+APP_SCRIPT = "DEAN Academics-HOD.py"
+STARTUP_BUDGET_SECONDS = float(os.environ.get("STARTUP_BUDGET_SECONDS", "3.0"))
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+_COLD_START = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({script!r}, default_timeout=60)
+at.run()
+first = time.perf_counter() - start
+at.sidebar.selectbox[0].select("Login").run()
+total = time.perf_counter() - start
+errors = [e.value for e in at.exception] + [e.value for e in at.error]
+print(json.dumps({{"first_run": first, "login": total, "errors": errors}}))
+"""
+
+
+def import_times(module):
+    """Imports module in a fresh interpreter with -X importtime; returns [(cumulative_us, self_us, name)]"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=HERE, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return rows
+
+
+def cold_start(db_dir):
+    """Runs the app headlessly against a scratch database and temp directory; returns timings in seconds"""
+    env = dict(os.environ, QUIZ_DB_PATH=os.path.join(db_dir, "quiz_app.db"), TMPDIR=db_dir,
+               PRERENDER_ON_START="0")
+    proc = subprocess.run([sys.executable, "-c", _COLD_START.format(script=os.path.join(HERE, APP_SCRIPT))],
+                          cwd=HERE, env=env, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip())
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import times and check the cold-start budget")
+    parser.add_argument("--page", default="login", help="Page module under app_pages/ to report on")
+    parser.add_argument("--top", type=int, default=25, help="How many of the slowest imports to list")
+    parser.add_argument("--check", action="store_true", help="Fail if Login's cold start exceeds the budget")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS, help="Budget in seconds")
+    args = parser.parse_args()
+
+    for module in ("bootstrap", f"app_pages.{args.page}"):
+        rows = import_times(module)
+        total = max(rows)[0] if rows else 0
+        print(f"import {module}: {total / 1e6:.3f}s cumulative, {len(rows)} modules")
+        for cumulative, own, name in sorted(rows, reverse=True)[:args.top]:
+            print(f"  {cumulative / 1e3:9.1f} ms  {own / 1e3:8.1f} ms self  {name.strip()}")
+
+    if args.check:
+        with tempfile.TemporaryDirectory() as db_dir:
+            timing = cold_start(db_dir)
+        print(f"cold start: first run {timing['first_run']:.2f}s, Login {timing['login']:.2f}s "
+              f"(budget {args.budget:.2f}s)")
+        if timing["errors"]:
+            print(f"page errors: {timing['errors']}")
+            return 1
+        if timing["login"] > args.budget:
+            print("FAIL: Login cold start is over budget")
+            return 1
+        print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,11 @@
+import pytest
+
+from startup_report import STARTUP_BUDGET_SECONDS, cold_start
+
+
+def test_login_cold_start_within_budget(tmp_path):
+    pytest.importorskip("streamlit.testing.v1")
+    timing = cold_start(str(tmp_path))
+    assert timing["errors"] == []
+    assert timing["login"] <= STARTUP_BUDGET_SECONDS, (
+        f"Login cold start took {timing['login']:.2f}s, budget {STARTUP_BUDGET_SECONDS:.2f}s")
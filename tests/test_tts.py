@@ -0,0 +1,77 @@
+import subprocess
+
+import pytest
+
+import tts
+from tts import EspeakEngine, get_engine, synthesize
+
+requires_espeak = pytest.mark.skipif(not EspeakEngine().binary, reason="espeak-ng/espeak is not installed")
+
+
+class FlakyEngine:
+    """Fails the first `failures` calls, then writes a file"""
+    name = "flaky"
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = []
+
+    def synthesize(self, text, path, lang='en', timeout=None):
+        self.calls.append(timeout)
+        if len(self.calls) <= self.failures:
+            raise OSError("synthesis failed")
+        with open(path, "wb") as f:
+            f.write(b"audio")
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(tts.time, "sleep", delays.append)
+    return delays
+
+
+@requires_espeak
+def test_espeak_synthesizes_mp3(tmp_path):
+    pytest.importorskip("imageio_ffmpeg")
+    path = synthesize(EspeakEngine(), "What is the capital of France?", str(tmp_path / "question.mp3"))
+    with open(path, "rb") as f:
+        header = f.read(3)
+    assert header == b"ID3" or header[:2] in (b"\xff\xfb", b"\xff\xf3", b"\xff\xf2")
+
+
+@requires_espeak
+def test_espeak_timeout_is_retried_then_raised(tmp_path, sleeps):
+    pytest.importorskip("imageio_ffmpeg")
+    with pytest.raises(subprocess.TimeoutExpired):
+        synthesize(EspeakEngine(), "A question long enough to outlast the timeout. " * 20,
+                   str(tmp_path / "question.mp3"), retries=1, timeout=0.001)
+    assert sleeps == [0.5]
+
+
+def test_espeak_without_binary_raises(tmp_path, monkeypatch):
+    engine = EspeakEngine()
+    monkeypatch.setattr(engine, "binary", None)
+    with pytest.raises(RuntimeError):
+        engine.synthesize("text", str(tmp_path / "question.mp3"))
+
+
+def test_synthesize_retries_with_backoff(tmp_path, sleeps):
+    engine = FlakyEngine(failures=2)
+    path = synthesize(engine, "text", str(tmp_path / "question.mp3"), retries=2, timeout=7)
+    assert open(path, "rb").read() == b"audio"
+    assert engine.calls == [7, 7, 7]
+    assert sleeps == [0.5, 1.0]
+
+
+def test_synthesize_gives_up_after_retries(tmp_path, sleeps):
+    engine = FlakyEngine(failures=10)
+    with pytest.raises(OSError):
+        synthesize(engine, "text", str(tmp_path / "question.mp3"), retries=2)
+    assert len(engine.calls) == 3
+    assert sleeps == [0.5, 1.0]
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        get_engine("nope")
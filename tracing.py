@@ -0,0 +1,254 @@
+"""Timing spans, counters and gauges for the app's hot paths.
+
+    with span("db.transaction"):
+        ...
+
+    @traced("tts.synthesize")
+    def synthesize(...):
+        ...
+
+Every span adds to a per-name aggregate: count, total and max seconds, and a latency
+histogram. A page rerun is a span too, opened with ``rerun(page)`` around the page's
+``render()``. Spans that finish on the rerun's thread are also totalled under that
+rerun, so the slowest recent reruns can be broken down by where the time went.
+Background threads (recorder writer, email sender, camera callbacks) only feed the
+aggregates.
+
+``prometheus_text()`` renders everything in the Prometheus text format. Set
+``METRICS_DIR`` and each process rewrites ``<METRICS_DIR>/quiz_<role>.prom`` every
+``METRICS_INTERVAL`` seconds, for node_exporter's textfile collector. Reruns slower
+than ``SLOW_RERUN_SECONDS`` are also appended to ``slow_reruns.jsonl`` there, which
+rolls over at ``SLOW_LOG_BYTES``. ``TRACING=0`` turns spans into no-ops.
+"""
+import os
+import json
+import time
+import bisect
+import threading
+from collections import deque
+from functools import wraps
+from contextlib import contextmanager
+
+ENABLED = os.environ.get("TRACING", "1") != "0"
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+METRICS_INTERVAL = float(os.environ.get("METRICS_INTERVAL", "15"))
+SLOW_RERUN_SECONDS = float(os.environ.get("SLOW_RERUN_SECONDS", "1.0"))
+SLOW_LOG_BYTES = 5 * 1024 * 1024
+RERUN_HISTORY = 500  # Recent reruns kept in memory for the Performance page
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PREFIX = "quiz"
+
+_lock = threading.Lock()
+_spans = {}  # name -> [count, total seconds, max seconds, bucket counts]
+_counters = {}
+_gauges = {}
+_gauge_callbacks = {}
+_reruns = deque(maxlen=RERUN_HISTORY)
+_slow = deque(maxlen=RERUN_HISTORY)  # Slow reruns waiting to be appended to the log
+_local = threading.local()
+_exporter = None
+
+
+def _observe(name, seconds):
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = [0, 0.0, 0.0, [0] * len(BUCKETS)]
+        stats[0] += 1
+        stats[1] += seconds
+        if seconds > stats[2]:
+            stats[2] = seconds
+        i = bisect.bisect_left(BUCKETS, seconds)
+        if i < len(BUCKETS):
+            stats[3][i] += 1
+
+
+@contextmanager
+def span(name):
+    """Times the block under name, in the aggregates and in the current rerun if any"""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _observe(name, elapsed)
+        current = getattr(_local, "rerun", None)
+        if current is not None:
+            entry = current["spans"].setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+
+def traced(name):
+    """Decorator form of span"""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def rerun(page):
+    """Times one page rerun and keeps its span breakdown for the slowest-reruns view.
+
+    Streamlit stops a rerun by raising through the page, so the rerun is recorded
+    however the block exits.
+    """
+    if not ENABLED or getattr(_local, "rerun", None) is not None:
+        yield
+        return
+    current = {"page": page, "started": time.time(), "seconds": 0.0, "spans": {}}
+    _local.rerun = current
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        _local.rerun = None
+        current["seconds"] = time.perf_counter() - start
+        _observe(f"rerun.{page}", current["seconds"])
+        with _lock:
+            _reruns.append(current)
+            # Only the exporter drains this, so there is nothing to buffer without METRICS_DIR
+            if METRICS_DIR and current["seconds"] >= SLOW_RERUN_SECONDS:
+                _slow.append(current)
+
+
+def count(name, n=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def gauge(name, value):
+    with _lock:
+        _gauges[name] = value
+
+
+def register_gauge(name, callback):
+    """Registers a function read at export time, e.g. a queue depth"""
+    with _lock:
+        _gauge_callbacks[name] = callback
+
+
+def slowest_reruns(limit=20, page=None):
+    """Slowest of the recent reruns, slowest first, each with its spans by total time"""
+    with _lock:
+        reruns = [r for r in _reruns if page is None or r["page"] == page]
+    reruns.sort(key=lambda r: r["seconds"], reverse=True)
+    return [dict(r, spans=sorted(r["spans"].items(), key=lambda s: s[1][1], reverse=True))
+            for r in reruns[:limit]]
+
+
+def span_summary():
+    """Per-span count, total, mean and max seconds, busiest first"""
+    with _lock:
+        rows = [(name, stats[0], stats[1], stats[2]) for name, stats in _spans.items()]
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return [{"span": name, "count": n, "total": total, "mean": total / n if n else 0.0, "max": peak}
+            for name, n, total, peak in rows]
+
+
+def snapshot():
+    """Current counters and gauges, with registered gauges read now"""
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        callbacks = list(_gauge_callbacks.items())
+    for name, callback in callbacks:
+        try:
+            gauges[name] = callback()
+        except Exception:
+            pass
+    return counters, gauges
+
+
+def _metric(name):
+    return PREFIX + "_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text():
+    """All spans, counters and gauges in the Prometheus text exposition format"""
+    with _lock:
+        spans = {name: (stats[0], stats[1], list(stats[3])) for name, stats in _spans.items()}
+    counters, gauges = snapshot()
+
+    lines = [f"# HELP {PREFIX}_span_seconds Time spent in instrumented code paths",
+             f"# TYPE {PREFIX}_span_seconds histogram"]
+    for name in sorted(spans):
+        n, total, buckets = spans[name]
+        cumulative = 0
+        for bound, hits in zip(BUCKETS, buckets):
+            cumulative += hits
+            lines.append(f'{PREFIX}_span_seconds_bucket{{span="{_label(name)}",le="{bound}"}} {cumulative}')
+        lines.append(f'{PREFIX}_span_seconds_bucket{{span="{_label(name)}",le="+Inf"}} {n}')
+        lines.append(f'{PREFIX}_span_seconds_sum{{span="{_label(name)}"}} {total:.6f}')
+        lines.append(f'{PREFIX}_span_seconds_count{{span="{_label(name)}"}} {n}')
+    for name in sorted(counters):
+        metric = _metric(name) + "_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {counters[name]}"]
+    for name in sorted(gauges):
+        metric = _metric(name)
+        lines += [f"# TYPE {metric} gauge", f"{metric} {gauges[name]}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path):
+    """Atomically replaces path with the current metrics"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+def _append_slow_reruns(path):
+    with _lock:
+        pending = list(_slow)
+        _slow.clear()
+    if not pending:
+        return
+    if os.path.exists(path) and os.path.getsize(path) >= SLOW_LOG_BYTES:
+        os.replace(path, path + ".1")
+    with open(path, "a") as f:
+        for r in pending:
+            f.write(json.dumps({"page": r["page"], "started": r["started"], "seconds": round(r["seconds"], 4),
+                                "spans": {name: round(s[1], 4) for name, s in r["spans"].items()}}) + "\n")
+
+
+def flush(role):
+    """Writes this process's metrics file and slow-rerun log, if METRICS_DIR is set"""
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    write_metrics(os.path.join(METRICS_DIR, f"quiz_{role}.prom"))
+    _append_slow_reruns(os.path.join(METRICS_DIR, "slow_reruns.jsonl"))
+
+
+def _run_exporter(role):
+    while True:
+        time.sleep(METRICS_INTERVAL)
+        try:
+            flush(role)
+        except Exception:
+            pass  # Disk full or similar; try again next interval
+
+
+def start_exporter(role="app"):
+    """Starts the periodic metrics writer once per process; does nothing without METRICS_DIR"""
+    global _exporter
+    if not METRICS_DIR:
+        return None
+    with _lock:
+        if _exporter is None or not _exporter.is_alive():
+            _exporter = threading.Thread(target=_run_exporter, args=(role,), name="metrics", daemon=True)
+            _exporter.start()
+    return _exporter
@@ -0,0 +1,76 @@
+"""Text-to-speech engines for question audio.
+
+``gtts`` calls Google's online TTS; ``espeak`` runs espeak-ng/espeak locally, so a
+question bank can be synthesized without network access. Pick one with the
+``TTS_ENGINE`` environment variable.
+"""
+import os
+import time
+import shutil
+import tempfile
+import subprocess
+
+from tracing import span, count
+
+TTS_ENGINE = os.environ.get("TTS_ENGINE", "gtts")
+TTS_TIMEOUT = 30  # Seconds per synthesis call
+TTS_RETRIES = 2  # Extra attempts after the first failure
+
+
+class GTTSEngine:
+    name = "gtts"
+
+    def synthesize(self, text, path, lang='en', timeout=TTS_TIMEOUT):
+        from gtts import gTTS
+
+        tts = gTTS(text=text, lang=lang, slow=False, timeout=timeout)
+        tts.save(path)
+
+
+class EspeakEngine:
+    """Offline engine using the espeak-ng (or espeak) binary, transcoded to mp3 with ffmpeg"""
+    name = "espeak"
+
+    def __init__(self):
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def synthesize(self, text, path, lang='en', timeout=TTS_TIMEOUT):
+        if not self.binary:
+            raise RuntimeError("espeak-ng/espeak is not installed")
+
+        import imageio_ffmpeg
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            wav_path = os.path.join(temp_dir, "speech.wav")
+            subprocess.run([self.binary, "-v", lang, "-w", wav_path, text],
+                           check=True, timeout=timeout, capture_output=True)
+            subprocess.run([imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+                            "-i", wav_path, path],
+                           check=True, timeout=timeout, capture_output=True)
+
+
+ENGINES = {
+    "gtts": GTTSEngine,
+    "espeak": EspeakEngine,
+}
+
+
+def get_engine(name=None):
+    name = name or TTS_ENGINE
+    if name not in ENGINES:
+        raise ValueError(f"Unknown TTS engine '{name}', expected one of {sorted(ENGINES)}")
+    return ENGINES[name]()
+
+
+def synthesize(engine, text, path, lang='en', retries=TTS_RETRIES, timeout=TTS_TIMEOUT):
+    """Synthesizes text to path, retrying with exponential backoff on failure"""
+    for attempt in range(retries + 1):
+        try:
+            with span(f"tts.{engine.name}"):
+                engine.synthesize(text, path, lang=lang, timeout=timeout)
+            return path
+        except Exception:
+            if attempt == retries:
+                raise
+            count("tts.retries")
+            time.sleep(0.5 * 2 ** attempt)
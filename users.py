@@ -0,0 +1,42 @@
+"""User accounts, roles and password changes, stored in the ``users`` table."""
+from db import transaction, query_one
+
+
+def user_exists(username):
+    return query_one("SELECT 1 FROM users WHERE username = ?", (username,)) is not None
+
+
+def create_user(username, password_hash, role, email):
+    """Inserts a user; raises sqlite3.IntegrityError if the username is taken"""
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO users (username, password, role, email) VALUES (?, ?, ?, ?)",
+            (username, password_hash, role, email)
+        )
+
+
+def find_username_by_email(email):
+    row = query_one("SELECT username FROM users WHERE email = ?", (email,))
+    return row[0] if row else None
+
+
+def update_password(username, password_hash, max_changes=None):
+    """Sets a new password and counts the change in one transaction.
+
+    Returns False without changing anything if the user has already used max_changes.
+    """
+    with transaction() as conn:
+        if max_changes is not None:
+            row = conn.execute("SELECT change_count FROM password_changes WHERE username = ?", (username,)).fetchone()
+            if row and row[0] >= max_changes:
+                return False
+        updated = conn.execute("UPDATE users SET password = ? WHERE username = ?",
+                               (password_hash, username)).rowcount
+        if not updated:
+            return False
+        conn.execute(
+            """INSERT INTO password_changes (username, change_count) VALUES (?, 1)
+               ON CONFLICT(username) DO UPDATE SET change_count = change_count + 1""",
+            (username,)
+        )
+    return True